@@ -0,0 +1,134 @@
+"""Unified SixEyes agent.
+
+Capabilities (telemetry, files, commands, services, packages, alerts) are enabled
+with --capabilities or a JSON --config file, and only the enabled ones are
+imported. sixeyes_agent.py, slave.py and abc.py are presets of this entry
+point.
+"""
+import json
+import argparse
+
+import capabilities
+
+ALL_CAPABILITIES = list(capabilities.MODULES)
+DEFAULT_HTTP_PORT = 5002
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='SocketIO Client')
+    parser.add_argument('master_ip', type=str, help='Master IP address')
+    parser.add_argument('agent_name', type=str, help='Agent name')
+    parser.add_argument('--config', type=str, help='JSON file with option defaults, e.g. {"capabilities": ["telemetry", "commands"]}')
+    parser.add_argument('--capabilities', type=str, default=','.join(ALL_CAPABILITIES), help=f"Comma-separated capabilities to enable ({', '.join(ALL_CAPABILITIES)})")
+    parser.add_argument('--master-port', type=int, default=5000, help='Master Socket.IO port')
+    parser.add_argument('--http-port', type=int, default=None, help=f'Port for the HTTP API (default {DEFAULT_HTTP_PORT} when the files capability is enabled)')
+    parser.add_argument('--runtime', choices=['threaded', 'asyncio'], default='threaded', help='threaded: blocking Socket.IO client and Flask server; asyncio: one event loop with an ASGI server (needs aiohttp and uvicorn)')
+    parser.add_argument('--handler-workers', type=int, default=None, help='Threads for blocking event handlers in the asyncio runtime')
+
+    # Core
+    parser.add_argument('--batch-size', type=int, default=1, help='Events per outbound batch (1 disables batching)')
+    parser.add_argument('--batch-age', type=float, default=0.25, help='Seconds an event may wait in a batch before it is flushed')
+    parser.add_argument('--ip-source', type=str, default='url', help="Public address source: 'url[:URL]', 'netifaces[:IFACE]' or 'static:ADDR'")
+    parser.add_argument('--ip-ttl', type=float, default=300, help='Seconds between public address refreshes')
+
+    # telemetry
+    parser.add_argument('--push-telemetry', action=argparse.BooleanOptionalAction, default=True, help='Push telemetry every sample (otherwise only answer handle_get_system_info)')
+    parser.add_argument('--telemetry-mode', choices=['json', 'delta'], default='json', help='json: full snapshot every tick, delta: inventory once then binary deltas')
+    parser.add_argument('--telemetry-event', type=str, default='system_info', help='Event name used for telemetry ticks')
+    parser.add_argument('--inventory-event', type=str, default='system_inventory', help='Event name used for the static inventory in delta mode')
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='Seconds between metric samples (sub-second values allowed)')
+    parser.add_argument('--adaptive-rate', action=argparse.BooleanOptionalAction, default=False, help='Adapt the sample interval to subscribe_telemetry/unsubscribe_telemetry and to metric changes (replaces --sample-interval)')
+    parser.add_argument('--active-profile', type=str, default='1:5', help='MIN:MAX sample interval in seconds while subscribed')
+    parser.add_argument('--idle-profile', type=str, default='10:60', help='MIN:MAX sample interval in seconds with no subscribers')
+    parser.add_argument('--change-threshold', type=float, default=5.0, help='Percentage points of CPU, memory or swap change that restore the fastest interval')
+    parser.add_argument('--io-rates', action=argparse.BooleanOptionalAction, default=True, help='Report per-disk and per-interface I/O rates with every sample')
+    parser.add_argument('--mount-interval', type=float, default=60, help='Seconds between filesystem usage refreshes (0 disables)')
+    parser.add_argument('--process-top', type=int, default=10, help='Processes reported in top_processes (0 disables process telemetry)')
+    parser.add_argument('--process-sort', choices=['cpu', 'memory', 'io'], default='cpu', help='Order used to pick the top processes')
+    parser.add_argument('--process-interval', type=float, default=5.0, help='Seconds between process table scans (stretched automatically on very busy hosts)')
+    parser.add_argument('--history-budget', type=int, default=None, help='Memory budget in bytes for the metrics history')
+
+    # files
+    parser.add_argument('--dir-cache-bytes', type=int, default=None, help='Memory bound in bytes for cached directory listings')
+    parser.add_argument('--file-op-workers', type=int, default=None, help='Parallel file operations inside /batch copy, move and delete jobs')
+    parser.add_argument('--du-workers', type=int, default=None, help='Directories scanned in parallel by /du')
+    parser.add_argument('--index-roots', type=str, default=None, help='Comma-separated directories indexed for /search (search is off without it)')
+    parser.add_argument('--index-snapshot', type=str, default=None, help='File the search index is saved to between restarts (default ~/.cache/sixeyes/file-index.json.gz)')
+    parser.add_argument('--index-interval', type=float, default=300, help='Seconds between incremental index refreshes')
+
+    # commands
+    parser.add_argument('--command-workers', type=int, default=None, help='Commands run in parallel')
+    parser.add_argument('--max-commands', type=int, default=None, help='Commands running or queued before new ones are rejected')
+    parser.add_argument('--command-timeout', type=float, default=None, help='Default command timeout in seconds')
+
+    # services
+    parser.add_argument('--services', type=str, default=None, help='Comma-separated systemd units to report')
+    parser.add_argument('--service-watch-interval', type=float, default=10, help='Seconds between unit state checks for change notifications (0 disables)')
+
+    # alerts
+    parser.add_argument('--rules', type=str, default=None, help='JSON file with alert rules, e.g. [{"name": "cpu_high", "metric": "TotalCPUUsage", "op": ">", "value": 90, "for": 30, "clear": 80}]; a "rules" list in --config also works')
+
+    # packages
+    parser.add_argument('--package-backend', choices=['apt', 'fake'], default='apt', help='Package manager used for install/uninstall (fake only records requests)')
+    return parser
+
+
+def load_config(path):
+    """Reads option defaults from a JSON file; list values for 'capabilities' are accepted."""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    if isinstance(config.get('capabilities'), list):
+        config['capabilities'] = ','.join(config['capabilities'])
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+
+def parse_args(argv=None, defaults=None):
+    parser = build_parser()
+    if defaults:
+        parser.set_defaults(**defaults)
+    # The config file only changes defaults, so explicit flags still win
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument('--config')
+    known, _ = pre.parse_known_args(argv)
+    if known.config:
+        parser.set_defaults(**load_config(known.config))
+    return parser.parse_args(argv)
+
+
+def main(argv=None, defaults=None):
+    args = parse_args(argv, defaults)
+    enabled = [name.strip() for name in args.capabilities.split(',') if name.strip()]
+    if args.http_port is None and 'files' in enabled:
+        args.http_port = DEFAULT_HTTP_PORT
+
+    # Imported here so --help does not pay for socketio
+    import core
+
+    core.configure(args)
+    if args.http_port:
+        core.get_app()
+
+    for name in enabled:
+        core.capabilities[name] = capabilities.load(name)
+    for module in core.capabilities.values():
+        module.configure(args)
+
+    if args.runtime == 'asyncio':
+        import async_runtime
+
+        async_runtime.main(args)
+        return
+
+    core.sio.connect(f'http://{args.master_ip}:{args.master_port}')
+    for module in core.capabilities.values():
+        module.start(args)
+
+    if core.app is not None:
+        # Run Flask app
+        core.app.run(host='0.0.0.0', port=args.http_port)
+
+    core.sio.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""Single-event-loop runtime for the agent (agent.py --runtime asyncio).
+
+The master connection uses socketio.AsyncClient and the HTTP API is served
+over ASGI by uvicorn on the same loop. Capability handlers are written as
+plain functions; here they are re-registered on the async client and run on
+a bounded thread pool, so psutil and subprocess calls never block the loop.
+The Flask app runs on a second pool, one request per thread, through the
+small WSGI bridge below. It reads each request body completely (spooled to
+a temporary file past 64 KB) before the app runs, so /upload/<id> chunks
+are not streamed to disk as they arrive the way they are under the
+threaded server.
+Needs the optional aiohttp and uvicorn packages.
+"""
+import sys
+import signal
+import asyncio
+import threading
+import functools
+import contextlib
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+
+import core
+
+DEFAULT_HANDLER_WORKERS = 8
+
+# Request bodies up to this size stay in memory before the app runs
+BODY_SPOOL = 64 * 1024
+
+# File API requests are mostly blocking I/O, so they get more threads than event handlers
+HTTP_WORKERS_PER_HANDLER = 4
+
+
+class LoopSocket:
+    """Thread-safe stand-in for socketio.Client's emit/connected API over an AsyncClient.
+
+    The emitter and every capability keep calling `emit` from whatever thread
+    they run on; the emission itself is scheduled on the event loop.
+    """
+
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+
+    @property
+    def connected(self):
+        return self.client.connected
+
+    def emit(self, event, data=None):
+        coro = self.client.emit(event, data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.loop.create_task(coro)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+def _offload(handler, executor):
+    @functools.wraps(handler)
+    async def wrapper(*args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(handler, *args))
+    return wrapper
+
+
+def bridge_handlers(source, client, executor):
+    """Registers every handler of the sync client `source` on the async `client`."""
+    for namespace, handlers in source.handlers.items():
+        for event, handler in handlers.items():
+            client.on(event, _offload(handler, executor), namespace=namespace)
+
+
+class WsgiBridge:
+    """Serves a WSGI app over ASGI, running each request on `executor`.
+
+    The request body is read completely before the app is called. Response
+    chunks are sent as the app yields them, each one waiting for the event
+    loop to take it, so streamed downloads keep their backpressure, and a
+    client that disconnects stops the app's iteration.
+    """
+
+    def __init__(self, app, executor):
+        self.app = app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        with SpooledTemporaryFile(max_size=BODY_SPOOL) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            disconnected = threading.Event()
+
+            async def watch():
+                while (await receive())['type'] != 'http.disconnect':
+                    pass
+                disconnected.set()
+
+            watcher = asyncio.create_task(watch())
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self.executor, self._respond, scope, body, send, loop, disconnected)
+            finally:
+                watcher.cancel()
+
+    @staticmethod
+    def environ(scope, body):
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'SERVER_NAME': scope['server'][0] if scope.get('server') else 'localhost',
+            'SERVER_PORT': str(scope['server'][1]) if scope.get('server') else '80',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+                name = f"HTTP_{name}"
+            value = value.decode('latin-1')
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def _respond(self, scope, body, send, loop, disconnected):
+        """Runs the app on a worker thread, handing every ASGI message to the loop."""
+        def deliver(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            }
+            return lambda data: send_chunk(data)
+
+        def send_chunk(data):
+            if not response.get('sent'):
+                response['sent'] = True
+                deliver(response['start'])
+            if data:
+                deliver({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        try:
+            result = self.app(self.environ(scope, body), start_response)
+            try:
+                for data in result:
+                    if disconnected.is_set():
+                        return
+                    send_chunk(data)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except Exception as e:
+            print(f"Error serving {scope['path']}: {e}")
+            if response.get('sent'):
+                return
+            response['start'] = {'type': 'http.response.start', 'status': 500,
+                                 'headers': [(b'content-type', b'text/plain')]}
+            send_chunk(b'Internal Server Error')
+        send_chunk(b'')
+        deliver({'type': 'http.response.body'})
+
+
+def _asgi_server(app, port, executor):
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise SystemExit(f"The asyncio runtime needs uvicorn for the HTTP API: {e}")
+
+    class Server(uvicorn.Server):
+        # Signals belong to the runtime, which stops the server during shutdown
+        def install_signal_handlers(self):
+            pass
+
+        @contextlib.contextmanager
+        def capture_signals(self):
+            yield
+
+    config = uvicorn.Config(WsgiBridge(app, executor), host='0.0.0.0', port=port, log_level='warning')
+    return Server(config)
+
+
+async def run(args):
+    """Connects to the master, serves the HTTP API and runs capability tasks until signalled."""
+    import socketio
+
+    loop = asyncio.get_running_loop()
+    workers = args.handler_workers or DEFAULT_HANDLER_WORKERS
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='handler')
+    # HTTP requests get their own pool so long downloads cannot starve master events
+    http_executor = ThreadPoolExecutor(max_workers=workers * HTTP_WORKERS_PER_HANDLER, thread_name_prefix='http')
+    loop.set_default_executor(executor)
+
+    # The runtime owns SIGINT so shutdown can be orderly
+    client = socketio.AsyncClient(handle_sigint=False)
+    bridge_handlers(core.sio, client, executor)
+    core.emitter.sio = LoopSocket(client, loop)
+
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    await client.connect(f'http://{args.master_ip}:{args.master_port}')
+
+    tasks = []
+    for module in core.capabilities.values():
+        start_async = getattr(module, 'start_async', None)
+        if start_async is not None:
+            tasks.append(asyncio.create_task(start_async(args)))
+        else:
+            await loop.run_in_executor(executor, module.start, args)
+
+    server = None
+    if core.app is not None:
+        server = _asgi_server(core.app, args.http_port, http_executor)
+        tasks.append(asyncio.create_task(server.serve()))
+
+    await stop.wait()
+
+    # Clean shutdown: stop accepting work, cancel tasks, then drop the connection
+    if server is not None:
+        server.should_exit = True
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    core.emitter.stop()
+    await client.disconnect()
+    executor.shutdown(wait=False, cancel_futures=True)
+    http_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(args):
+    asyncio.run(run(args))
+
+
+async def wait_for_samples(sampler):
+    """Async iterator over new sampler snapshots, fed from the sampler thread.
+
+    Only the newest snapshot is kept if the consumer falls behind.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=1)
+
+    def deliver(snapshot):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+    def on_sample(snapshot):
+        loop.call_soon_threadsafe(deliver, snapshot)
+
+    sampler.add_listener(on_sample)
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        sampler.remove_listener(on_sample)
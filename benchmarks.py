@@ -0,0 +1,339 @@
+"""Offline benchmarks for the agent's hot paths.
+
+Runs get_system_info (over fake psutil data), directory listing,
+get_file_content, /download, the JSON encoding done by the emitter and
+package queue coalescing (over a fake package manager) against a
+synthetic directory tree and large files in a temporary directory.
+Results can be saved as a JSON baseline and later compared against it;
+the comparison exits non-zero when a case regresses by more than the
+given threshold.
+
+    python benchmarks.py --save baseline.json
+    python benchmarks.py --compare baseline.json --threshold 0.25
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from unittest import mock
+
+BASELINE_VERSION = 1
+
+# Peak memory differences below this many bytes are noise, whatever the ratio
+MEMORY_NOISE_BYTES = 64 * 1024
+
+CASES = {}
+# Cases that build a system_info payload and so run over FakePsutil
+FAKE_PSUTIL_CASES = set()
+
+
+def benchmark(name, fake_psutil=False):
+    """Registers `setup(workspace)`, which returns the callable to time.
+
+    With `fake_psutil`, metrics.psutil is patched with FakePsutil for the
+    setup and the measurement of that case only, so the payload is the same
+    whichever cases run and in whatever order.
+    """
+    def register(setup):
+        CASES[name] = setup
+        if fake_psutil:
+            FAKE_PSUTIL_CASES.add(name)
+        return setup
+    return register
+
+
+class FakePsutil:
+    """The psutil calls made by get_system_info, with fixed answers."""
+
+    def __init__(self, cores):
+        self.cores = cores
+
+    def boot_time(self):
+        return 1700000000.0
+
+    def cpu_count(self, logical=True):
+        return self.cores if logical else self.cores // 2
+
+    def cpu_freq(self):
+        return mock.Mock(current=2400.0, min=800.0, max=3600.0)
+
+
+def fake_snapshot(cores, disks=4, nics=4):
+    """A sampler snapshot of a large host: per-core CPU plus disk, network and mount keys."""
+    snapshot = {'Timestamp': time.time(), 'TotalCPUUsage': 42.5, 'CurrentFrequency': 2400.0}
+    for i in range(cores):
+        snapshot[f"Core_{i}"] = float(i % 100)
+    snapshot.update({
+        'Memory.Total': 256 << 30, 'Memory.Available': 128 << 30, 'Memory.Used': 120 << 30, 'Memory.Percentage': 50.0,
+        'Swap.Total': 8 << 30, 'Swap.Free': 6 << 30, 'Swap.Used': 2 << 30, 'Swap.Percentage': 25.0,
+    })
+    for i in range(disks):
+        for label in ('ReadRate', 'WriteRate', 'ReadOps', 'WriteOps'):
+            snapshot[f"Disk.sd{chr(97 + i)}.{label}"] = 1024.0 * i
+        for label in ('Total', 'Used', 'Free'):
+            snapshot[f"Mount./data{i}.{label}"] = 1 << 40
+        snapshot[f"Mount./data{i}.Percentage"] = 50.0
+    for i in range(nics):
+        for label in ('SentRate', 'RecvRate', 'PacketsSent', 'PacketsRecv', 'ErrorsIn', 'ErrorsOut'):
+            snapshot[f"Net.eth{i}.{label}"] = 2048.0 * i
+    return snapshot
+
+
+class NullSocket:
+    connected = True
+
+    def emit(self, event, data=None):
+        pass
+
+
+class Workspace:
+    """Synthetic files in a temporary directory, created once per run."""
+
+    def __init__(self, files=10000, file_size=64 << 20, cores=64):
+        self.cores = cores
+        self.root = tempfile.mkdtemp(prefix='sixeyes-bench-')
+        self.tree = os.path.join(self.root, 'tree')
+        os.mkdir(self.tree)
+        for i in range(files):
+            with open(os.path.join(self.tree, f"file_{i:06d}.log"), 'wb') as f:
+                f.write(b'x' * (i % 4096))
+        for i in range(files // 100):
+            os.mkdir(os.path.join(self.tree, f"dir_{i:04d}"))
+
+        self.large = os.path.join(self.root, 'large.log')
+        line = b'2024-01-01T00:00:00 INFO agent heartbeat ok sequence=0000000000\n'
+        with open(self.large, 'wb') as f:
+            block = line * ((1 << 20) // len(line))
+            written = 0
+            while written < file_size:
+                f.write(block)
+                written += len(block)
+
+    def url_path(self, path):
+        # The HTTP API resolves paths relative to BASE_DIR ('/')
+        return path.lstrip('/')
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+@benchmark('get_system_info', fake_psutil=True)
+def bench_system_info(ws):
+    from capabilities import metrics
+
+    snapshot = fake_snapshot(ws.cores)
+    return lambda: metrics.get_system_info(snapshot)
+
+
+@benchmark('emit_json', fake_psutil=True)
+def bench_emit_json(ws):
+    from emitter import BatchEmitter
+    from capabilities import metrics
+
+    payload = metrics.get_system_info(fake_snapshot(ws.cores))
+    emitter = BatchEmitter(NullSocket())
+    return lambda: emitter.emit('system_info', payload)
+
+
+@benchmark('emit_batch', fake_psutil=True)
+def bench_emit_batch(ws):
+    from emitter import BatchEmitter
+    from capabilities import metrics
+
+    payload = metrics.get_system_info(fake_snapshot(ws.cores))
+    emitter = BatchEmitter(NullSocket(), max_batch=1000)
+
+    def run():
+        for _ in range(100):
+            emitter.emit('system_info', payload)
+        emitter.flush()
+    return run
+
+
+@benchmark('list_files')
+def bench_list_files(ws):
+    from listing import list_files
+
+    return lambda: list_files(ws.tree, sort='mtime')
+
+
+@benchmark('http_list_cached')
+def bench_http_list(ws):
+    client = _client()
+    url = f"/?path={ws.url_path(ws.tree)}&sort=size&limit=500"
+    return lambda: client.get(url).get_data()
+
+
+@benchmark('get_file_content_range')
+def bench_content_range(ws):
+    from capabilities.file_api import get_file_content
+
+    offset = os.path.getsize(ws.large) // 2
+    return lambda: get_file_content(ws.large, 'bytes', offset)
+
+
+@benchmark('get_file_content_tail')
+def bench_content_tail(ws):
+    from capabilities.file_api import get_file_content
+
+    return lambda: get_file_content(ws.large, 'tail', lines=1000)
+
+
+@benchmark('download')
+def bench_download(ws):
+    client = _client()
+    url = f"/download/{ws.url_path(ws.large)}"
+    return lambda: _drain(client.get(url))
+
+
+@benchmark('download_gzip')
+def bench_download_gzip(ws):
+    client = _client()
+    url = f"/download/{ws.url_path(ws.large)}?compress=gzip"
+    return lambda: _drain(client.get(url, headers={'Accept-Encoding': 'gzip'}))
+
+
+@benchmark('package_queue')
+def bench_package_queue(ws):
+    import threading
+    from packages import PackageQueue, FakeBackend, INSTALL
+
+    names = [f"pkg-{i:03d}" for i in range(64)]
+    finished = threading.Semaphore(0)
+    queue = PackageQueue(FakeBackend(), on_done=lambda *args, **kwargs: finished.release(), window=0)
+    queue.start()
+
+    def run():
+        for name in names:
+            queue.submit(INSTALL, name)
+        for _ in names:
+            finished.acquire()
+    return run
+
+
+def _client():
+    from capabilities import file_api
+
+    return file_api.app.test_client()
+
+
+def _drain(response):
+    # Iterate the body like a WSGI server would, without buffering it in the client
+    for _ in response.response:
+        pass
+    response.close()
+
+
+def measure(fn, repeat, warmup=2):
+    """Times `repeat` calls of `fn` and the peak Python allocation of one call."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(timings[len(timings) // 2] * 1000, 4),
+        'p90_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.9))] * 1000, 4),
+        'min_ms': round(timings[0] * 1000, 4),
+        'peak_bytes': peak,
+    }
+
+
+def _case_patches(name, ws):
+    if name not in FAKE_PSUTIL_CASES:
+        return contextlib.nullcontext()
+    from capabilities import metrics
+
+    return mock.patch.object(metrics, 'psutil', FakePsutil(ws.cores))
+
+
+def run(names, repeat, files, file_size):
+    ws = Workspace(files, file_size)
+    results = {}
+    try:
+        for name in names:
+            with _case_patches(name, ws):
+                fn = CASES[name](ws)
+                results[name] = measure(fn, repeat)
+            print(f"{name:24} {results[name]['median_ms']:>10.3f} ms  {results[name]['peak_bytes']:>12} B", file=sys.stderr)
+    finally:
+        ws.cleanup()
+    return {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold, memory_threshold):
+    """Returns the regressions of `current` against `baseline` as printable lines."""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = result['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        if change > threshold:
+            regressions.append(f"{name}: median {base['median_ms']:.3f} -> {result['median_ms']:.3f} ms (+{change:.0%})")
+        growth = result['peak_bytes'] - base['peak_bytes']
+        if growth > MEMORY_NOISE_BYTES and growth > base['peak_bytes'] * memory_threshold:
+            regressions.append(f"{name}: peak memory {base['peak_bytes']} -> {result['peak_bytes']} bytes")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the agent hot paths')
+    parser.add_argument('--only', type=str, default=None, help=f"Comma-separated cases ({', '.join(CASES)})")
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case')
+    parser.add_argument('--files', type=int, default=10000, help='Files in the synthetic directory')
+    parser.add_argument('--file-size', type=int, default=64 << 20, help='Size in bytes of the large file')
+    parser.add_argument('--save', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None, help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown of the median')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Allowed relative growth of peak memory')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+
+    current = run(names, args.repeat, args.files, args.file_size)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+    else:
+        print(json.dumps(current, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BASELINE_VERSION:
+            sys.exit(f"Unsupported baseline version: {baseline.get('version')}")
+        regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print('No regressions', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""Agent capability modules.
+
+Each module registers its Socket.IO handlers (and HTTP routes) when it is
+imported, so a capability that is not enabled costs neither import time nor
+memory. Every module provides `configure(args)`, run before connecting to
+the master, and `start(args)`, run once connected. Under the asyncio runtime
+an `async start_async(args)` is preferred when a module defines one.
+"""
+import importlib
+
+MODULES = {
+    'telemetry': 'capabilities.metrics',
+    'files': 'capabilities.file_api',
+    'commands': 'capabilities.commands',
+    'services': 'capabilities.service_control',
+    'packages': 'capabilities.package_ops',
+    'alerts': 'capabilities.alerts',
+}
+
+
+def load(name):
+    """Imports the module behind capability `name`."""
+    if name not in MODULES:
+        raise ValueError(f"Unknown capability: {name} (choose from {', '.join(MODULES)})")
+    return importlib.import_module(MODULES[name])
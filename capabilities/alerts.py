@@ -0,0 +1,68 @@
+import json
+import time
+import threading
+
+import core
+from rules import Rule, RuleEngine, DEFAULT_RULES
+
+sio = core.sio
+emitter = core.emitter
+
+# Local threshold rules over sampled metrics and unit states; built in configure()
+engine = None
+
+# Without telemetry there are no sampler ticks, so unit state rules are re-evaluated this often
+TICK_INTERVAL = 5
+
+def send_alert(event, data):
+    emitter.emit(event, data)
+
+def on_sample(snapshot):
+    engine.update(snapshot, snapshot['Timestamp'])
+
+def on_service_change(changed):
+    engine.update({f"Service.{s['name']}": s['status'] for s in changed}, persistent=True)
+
+def tick():
+    while True:
+        time.sleep(TICK_INTERVAL)
+        engine.update({})
+
+def resend_firing(public_ip):
+    """A new master session has not seen the alerts that are already active."""
+    for alert in engine.firing():
+        emitter.emit('alert', alert)
+
+@sio.event
+def get_alerts():
+    emitter.emit('get_alerts_result', {'firing': engine.firing(), 'rules': [rule.name for rule in engine.rules]})
+
+def load_rules(rules):
+    """Accepts a list of rule configs or the path of a JSON file holding one."""
+    if rules is None:
+        return DEFAULT_RULES
+    if isinstance(rules, str):
+        with open(rules, encoding='utf-8') as f:
+            return json.load(f)
+    return rules
+
+def configure(args):
+    global engine
+    engine = RuleEngine([Rule.from_config(rule) for rule in load_rules(args.rules)], send_alert)
+    core.on_connect(resend_firing)
+
+def start(args):
+    telemetry = core.capability('telemetry')
+    if telemetry is not None:
+        telemetry.sampler.add_listener(on_sample)
+    else:
+        print("Alerts: telemetry capability is disabled, metric rules will not be evaluated")
+        threading.Thread(target=tick, name='alerts-tick', daemon=True).start()
+
+    services = core.capability('services')
+    if services is not None:
+        services.service_provider.add_listener(on_service_change)
+        try:
+            on_service_change(services.service_provider.get())
+        except OSError as e:
+            print(e)
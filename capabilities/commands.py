@@ -0,0 +1,40 @@
+import core
+from jobs import JobExecutor, DEFAULT_WORKERS, DEFAULT_MAX_JOBS
+
+sio = core.sio
+emitter = core.emitter
+
+# Shell commands run on a bounded pool instead of inside the event handler
+job_executor = None
+
+@sio.event
+def command(data):
+    """Queues a shell command; accepts a plain string or {'command', 'timeout', 'job_id'}."""
+    print(data)
+    if isinstance(data, dict):
+        command_line, timeout, job_id = data.get('command'), data.get('timeout'), data.get('job_id')
+    else:
+        command_line, timeout, job_id = str(data), None, None
+    try:
+        job = job_executor.submit(command_line, timeout, job_id, data)
+    except (RuntimeError, ValueError) as e:
+        print(e)
+        emitter.emit('command_result', {'error': str(e), 'data': data})
+        return None
+    return {'job_id': job.id}
+
+@sio.event
+def cancel_command(job_id):
+    emitter.emit('cancel_command_result', {'job_id': job_id, 'cancelled': job_executor.cancel(job_id)})
+
+@sio.event
+def list_commands():
+    emitter.emit('list_commands_result', [job.info() for job in job_executor.active()])
+
+def configure(args):
+    global job_executor
+    job_executor = JobExecutor(emitter.emit, args.command_workers or DEFAULT_WORKERS,
+                               args.max_commands or DEFAULT_MAX_JOBS, args.command_timeout)
+
+def start(args):
+    pass
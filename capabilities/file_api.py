@@ -0,0 +1,353 @@
+import os
+import json
+import time
+from urllib.parse import unquote
+
+from flask import Response, request, jsonify, send_file
+
+import core
+from listing import STREAM_THRESHOLD, iter_entries, iter_json, paginate, select
+from filecontent import MAX_CHUNK, DEFAULT_LINES, read_content
+from uploads import UploadManager, UploadError
+from downloads import negotiate_encoding, compressed_response
+from dircache import DirectoryCache, DEFAULT_MAX_BYTES as DIR_CACHE_BYTES
+from fileindex import FileIndex, DEFAULT_LIMIT as SEARCH_LIMIT
+from diskusage import DiskUsage, DEFAULT_WORKERS as DU_WORKERS
+from fileops import FileOpManager, FileOpError, DEFAULT_WORKERS as FILEOP_WORKERS
+
+# File API routes live on the agent's shared Flask app
+app = core.get_app()
+
+# Define the base directory to manage
+BASE_DIR = '/'
+
+# Cached directory listings for the file explorer
+dir_cache = DirectoryCache()
+
+# Chunked uploads in progress; sessions idle this long are discarded
+upload_manager = UploadManager()
+UPLOAD_MAX_IDLE = 24 * 3600
+
+# Filename index behind /search; only built when --index-roots is given
+file_index = None
+INDEX_SNAPSHOT = os.path.expanduser('~/.cache/sixeyes/file-index.json.gz')
+
+# Recursive directory sizes for /du, cached per directory; created in configure()
+disk_usage = None
+
+# Background batch copy/move/delete jobs; created in configure()
+file_ops = None
+
+def get_file_content(file_path, mode='bytes', offset=0, length=MAX_CHUNK, lines=DEFAULT_LINES):
+    """Reads one window of a file through mmap, so memory use does not depend on file size."""
+    return read_content(file_path, mode, offset, length, lines)
+
+@app.route('/')
+def file_explorer():
+    path = request.args.get('path', '')
+    full_path = os.path.join(BASE_DIR, path)
+
+    if not os.path.exists(full_path):
+        return jsonify({'error': f'Path does not exist: {path}'}), 404
+    if not os.path.isdir(full_path):
+        return jsonify({'error': f'Not a directory: {path}'}), 400
+
+    sort = request.args.get('sort', 'name')
+    reverse = request.args.get('order', 'asc') == 'desc'
+    pattern = request.args.get('filter')
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+
+    # Unsorted, unpaginated listings stream straight from scandir
+    if sort == 'none' and limit is None:
+        return Response(iter_json({'current_path': path}, iter_entries(full_path, pattern)), mimetype='application/json')
+
+    # Unchanged directories are answered from the cache's ETag alone
+    etag = dir_cache.etag(full_path)
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    try:
+        etag, files = dir_cache.get(full_path)
+        files = select(files, pattern, sort, reverse)
+        total = len(files)
+        files, next_cursor = paginate(files, sort, reverse, cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fields = {'current_path': path, 'total': total, 'next_cursor': next_cursor}
+    if len(files) > STREAM_THRESHOLD:
+        response = Response(iter_json(fields, files), mimetype='application/json')
+    else:
+        response = jsonify({'files': files, **fields})
+    response.set_etag(etag)
+    return response
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    path = request.form['path']
+    upload_dir = os.path.join(BASE_DIR, path)
+
+    if 'file' in request.files:
+        file = request.files['file']
+        if file.filename != '':
+            filename = os.path.join(upload_dir, file.filename)
+            file.save(filename)
+            return jsonify({'message': 'File uploaded successfully'}), 200
+
+    return jsonify({'error': 'No file uploaded'}), 400
+
+@app.route('/upload/init', methods=['POST'])
+def upload_init():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    size = data.get('size')
+    try:
+        size = int(size) if size is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': f"Invalid size: {size!r}"}), 400
+    if size is not None and size < 0:
+        return jsonify({'error': f"Invalid size: {size}"}), 400
+    if not isinstance(data.get('path', ''), str) or not isinstance(data.get('filename'), str):
+        return jsonify({'error': 'path and filename must be strings'}), 400
+    upload_manager.expire(UPLOAD_MAX_IDLE)
+    try:
+        session = upload_manager.create(
+            os.path.join(BASE_DIR, data.get('path', '')),
+            data['filename'],
+            size,
+            data.get('sha256'),
+        )
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify(session.status()), 200
+
+@app.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    try:
+        return jsonify(upload_manager.get(upload_id).status()), 200
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+
+@app.route('/upload/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset is required'}), 400
+    try:
+        status = upload_manager.write_chunk(upload_id, offset, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify(status), 200
+
+@app.route('/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        result = upload_manager.complete(upload_id, data.get('sha256'))
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    dir_cache.invalidate(os.path.dirname(result['path']))
+    return jsonify({'message': 'File uploaded successfully', **result}), 200
+
+@app.route('/upload/<upload_id>', methods=['DELETE'])
+def upload_abort(upload_id):
+    try:
+        upload_manager.abort(upload_id)
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    return jsonify({'message': 'Upload aborted'}), 200
+
+@app.route('/delete', methods=['POST'])
+def delete_file():
+    data = request.get_json()
+    path = data.get('path')
+    filename = data.get('filename')
+    file_path = os.path.join(BASE_DIR, path, filename)
+
+    if os.path.exists(file_path):
+        if os.path.isdir(file_path):
+            os.rmdir(file_path)
+        else:
+            os.remove(file_path)
+        return jsonify({'message': 'File deleted successfully'}), 200
+    else:
+        return jsonify({'error': 'File not found'}), 404
+
+@app.route('/rename', methods=['POST'])
+def rename_file():
+    data = request.get_json()
+    path = data.get('path', '')
+    old_name = data.get('old_name', '')
+    new_name = data.get('new_name', '')
+
+    old_path = os.path.join(BASE_DIR, path, old_name)
+    new_path = os.path.join(BASE_DIR, path, new_name)
+
+    if os.path.exists(old_path):
+        os.rename(old_path, new_path)
+        return jsonify({'message': 'File renamed successfully'}), 200
+    else:
+        return jsonify({'error': 'File not found'}), 404
+
+@app.route('/create_file', methods=['POST'])
+def create_file():
+    data = request.get_json()
+    path = data.get('path')
+    file_name = data.get('file_name')
+    file_content = data.get('file_content')
+    file_path = os.path.join(BASE_DIR, path, file_name)
+
+    try:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(file_content)
+        return jsonify({'message': 'File created successfully'}), 200
+    except Exception as err:
+        return jsonify({'error': str(err)}), 500
+
+@app.route('/get_content', methods=['POST'])
+def get_file_content_api():
+    data = request.get_json()
+    path = data.get('path')
+    filename = data.get('filename')
+    file_path = os.path.join(BASE_DIR, path, filename)
+
+    if not os.path.isfile(file_path):
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        result = get_file_content(
+            file_path,
+            mode=data.get('mode', 'bytes'),
+            offset=int(data.get('offset', data.get('cursor') or 0)),
+            length=int(data.get('length', MAX_CHUNK)),
+            lines=int(data.get('lines', DEFAULT_LINES)),
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result), 200
+
+@app.route('/download/<path:file_path>', methods=['GET'])
+def download_file(file_path):
+    try:
+        # Decode the file path
+        decoded_file_path = unquote(file_path)
+
+        # Construct the absolute file path
+        absolute_file_path = os.path.normpath(os.path.join(BASE_DIR, decoded_file_path))
+        # print(absolute_file_path)
+        # Check if the resolved absolute path is within the allowed directory (BASE_DIR)
+        if not absolute_file_path.startswith(BASE_DIR):
+            return jsonify({'error': 'Invalid file path or unauthorized access'}), 403
+
+        # Check if the file exists and is a regular file
+        if not os.path.isfile(absolute_file_path):
+            return jsonify({'error': 'File not found or invalid path'}), 404
+
+        # Opt-in streaming compression (?compress=gzip|zstd|1) for whole-file text downloads
+        if 'Range' not in request.headers:
+            encoding = negotiate_encoding(request.args.get('compress'), request.headers.get('Accept-Encoding', ''), absolute_file_path)
+            if encoding:
+                return compressed_response(request, absolute_file_path, encoding)
+
+        # Serve the file for download; conditional=True adds Range/206, ETag and
+        # Last-Modified handling, and the server's wsgi.file_wrapper (sendfile) is used when available
+        return send_file(absolute_file_path, as_attachment=True, conditional=True, etag=True, max_age=0)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/search', methods=['GET'])
+def search_files():
+    if file_index is None:
+        return jsonify({'error': 'File search is disabled; start the agent with --index-roots'}), 503
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+    path = request.args.get('path')
+    under = os.path.join(BASE_DIR, path) if path else None
+    kind = request.args.get('type')
+    if kind not in ('file', 'directory'):
+        kind = None
+
+    started = time.perf_counter()
+    total, results = file_index.search(query, limit, under, kind)
+    took = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify({'query': query, 'total': total, 'results': results, 'took_ms': took, 'index': file_index.stats()})
+
+@app.route('/du', methods=['GET'])
+def directory_usage():
+    path = request.args.get('path', '')
+    full_path = os.path.join(BASE_DIR, path)
+    if not os.path.isdir(full_path):
+        return jsonify({'error': f'Not a directory: {path}'}), 404
+
+    refresh = request.args.get('refresh') in ('1', 'true')
+    records = disk_usage.walk(full_path, refresh)
+
+    # Each top-level entry is sent as one NDJSON line as soon as its subtree is done
+    if request.args.get('stream', '1') not in ('0', 'false'):
+        return Response((json.dumps(record) + '\n' for record in records), mimetype='application/x-ndjson')
+
+    entries = list(records)
+    summary = entries.pop()
+    entries.sort(key=lambda entry: entry['size'], reverse=True)
+    return jsonify({'current_path': path, 'entries': entries, **summary})
+
+def on_file_op_done(job):
+    """Drops cached listings of every directory the job changed."""
+    for path in job.paths:
+        dir_cache.invalidate(os.path.dirname(path))
+    if job.destination:
+        dir_cache.invalidate(job.destination)
+
+@app.route('/batch/<action>', methods=['POST'])
+def batch_file_op(action):
+    data = request.get_json(silent=True) or {}
+    paths = data.get('paths') or []
+    if not isinstance(paths, list) or not all(isinstance(path, str) and path for path in paths):
+        return jsonify({'error': 'paths must be a list of non-empty strings'}), 400
+    destination = data.get('destination')
+    if destination is not None and not isinstance(destination, str):
+        return jsonify({'error': 'destination must be a string'}), 400
+    paths = [os.path.join(BASE_DIR, path) for path in paths]
+    if destination is not None:
+        destination = os.path.join(BASE_DIR, destination)
+    try:
+        job = file_ops.submit(action, paths, destination, bool(data.get('overwrite')))
+    except FileOpError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(job.info(results=False)), 202
+
+@app.route('/batch', methods=['GET'])
+def batch_file_op_list():
+    return jsonify([job.info(results=False) for job in file_ops.jobs()])
+
+@app.route('/batch/<job_id>', methods=['GET'])
+def batch_file_op_status(job_id):
+    try:
+        return jsonify(file_ops.get(job_id).info()), 200
+    except FileOpError as e:
+        return jsonify({'error': str(e)}), e.status
+
+@app.route('/batch/<job_id>', methods=['DELETE'])
+def batch_file_op_cancel(job_id):
+    try:
+        return jsonify(file_ops.cancel(job_id).info(results=False)), 200
+    except FileOpError as e:
+        return jsonify({'error': str(e)}), e.status
+
+def configure(args):
+    global file_index, disk_usage, file_ops
+    disk_usage = DiskUsage(args.du_workers or DU_WORKERS)
+    file_ops = FileOpManager(args.file_op_workers or FILEOP_WORKERS, on_done=on_file_op_done)
+    dir_cache.max_bytes = args.dir_cache_bytes or DIR_CACHE_BYTES
+    if args.index_roots:
+        roots = [root for root in args.index_roots.split(',') if root]
+        file_index = FileIndex(roots, args.index_snapshot or INDEX_SNAPSHOT, args.index_interval)
+
+def start(args):
+    if file_index is not None:
+        file_index.start()
@@ -0,0 +1,256 @@
+import time
+import platform
+import threading
+from datetime import datetime
+
+import psutil
+
+import core
+import telemetry
+import iostats
+import ratecontrol
+from sampler import MetricSampler
+from processes import ProcessTable
+from history import MetricsHistory, DEFAULT_BUDGET_BYTES, default_series
+
+sio = core.sio
+emitter = core.emitter
+
+# Background sampler for CPU, memory and swap; started in configure()
+sampler = MetricSampler()
+
+# Adapts the sample interval to subscriptions and metric changes; None when disabled
+rate_controller = None
+
+# Top-N process table; None when --process-top is 0
+process_table = None
+
+# Rolled-up metrics history served from /metrics/history; fed by the sampler
+history = None
+
+# Telemetry protocol settings, overridden from the command line
+push = True
+telemetry_mode = 'json'
+telemetry_event = 'system_info'
+inventory_event = 'system_inventory'
+delta_encoder = telemetry.DeltaEncoder()
+
+def get_size(bytes, suffix="B"):
+    """Convert bytes to a more suitable unit and format."""
+    factor = 1024
+    for unit in ["", "K", "M", "G", "T", "P"]:
+        if bytes < factor:
+            return f"{bytes:.2f}{unit}{suffix}"
+        bytes /= factor
+
+def get_system_info(snapshot=None):
+    """Collects detailed system, CPU, and memory information into a dictionary."""
+    system_info = {}
+
+    # System Information
+    uname = platform.uname()
+    system_info['System'] = uname.system
+    system_info['NodeName'] = uname.node
+    system_info['Release'] = uname.release
+    system_info['Version'] = uname.version
+    system_info['Machine'] = uname.machine
+    system_info['Processor'] = uname.processor
+    system_info['PublicIP'] = core.get_public_ip()
+
+    # Boot Time
+    boot_time_timestamp = psutil.boot_time()
+    bt = datetime.fromtimestamp(boot_time_timestamp)
+    system_info['BootTime'] = f"{bt.year}/{bt.month}/{bt.day} {bt.hour}:{bt.minute}:{bt.second}"
+
+    # CPU Information
+    system_info['PhysicalCores'] = psutil.cpu_count(logical=False)
+    system_info['TotalCores'] = psutil.cpu_count(logical=True)
+    cpufreq = psutil.cpu_freq()
+    system_info['MaxFrequency'] = f"{cpufreq.max:.2f}Mhz"
+    system_info['MinFrequency'] = f"{cpufreq.min:.2f}Mhz"
+    system_info['CurrentFrequency'] = f"{cpufreq.current:.2f}Mhz"
+
+    # CPU, memory and swap usage come from the background sampler's latest snapshot
+    if snapshot is None:
+        snapshot = sampler.latest()
+    system_info['Timestamp'] = snapshot['Timestamp']
+
+    cpu_usage_per_core = {}
+    for i in range(system_info['TotalCores']):
+        cpu_usage_per_core[f"Core_{i}"] = f"{snapshot[f'Core_{i}']}"
+    system_info['CPUUsagePerCore'] = cpu_usage_per_core
+    system_info['TotalCPUUsage'] = f"{snapshot['TotalCPUUsage']}"
+
+    # Memory Information
+    memory_info = {}
+    memory_info['Total'] = get_size(snapshot['Memory.Total'])
+    memory_info['Available'] = get_size(snapshot['Memory.Available'])
+    memory_info['Used'] = get_size(snapshot['Memory.Used'])
+    memory_info['Percentage'] = f"{snapshot['Memory.Percentage']}"
+    system_info['MemoryInformation'] = memory_info
+
+    swap_info = {}
+    swap_info['Total'] = get_size(snapshot['Swap.Total'])
+    swap_info['Free'] = get_size(snapshot['Swap.Free'])
+    swap_info['Used'] = get_size(snapshot['Swap.Used'])
+    swap_info['Percentage'] = f"{snapshot['Swap.Percentage']}"
+    system_info['Swap'] = swap_info
+
+    # Disk, network and filesystem figures are present when their collectors are enabled
+    disk_io, network_io, disk_usage = {}, {}, {}
+    for key, value in snapshot.items():
+        prefix, _, rest = key.partition('.')
+        name, _, label = rest.rpartition('.')
+        if not name:
+            continue
+        if prefix == 'Disk':
+            disk_io.setdefault(name, {})[label] = f"{get_size(value)}/s" if label.endswith('Rate') else f"{value}"
+        elif prefix == 'Net':
+            network_io.setdefault(name, {})[label] = f"{get_size(value)}/s" if label.endswith('Rate') else f"{value}"
+        elif prefix == 'Mount':
+            disk_usage.setdefault(name, {})[label] = f"{value}" if label == 'Percentage' else get_size(value)
+    if disk_io:
+        system_info['DiskIO'] = disk_io
+    if network_io:
+        system_info['NetworkIO'] = network_io
+    if disk_usage:
+        system_info['DiskUsage'] = disk_usage
+
+    return system_info
+
+def send_system_info():
+    # One emit per new sample, so the cadence is exactly the sampler interval
+    seq = 0
+    while True:
+        seq, snapshot = sampler.wait_for_sample(seq)
+        if telemetry_mode == 'delta':
+            emitter.emit(telemetry_event, delta_encoder.encode(snapshot, snapshot['Timestamp']), raw=True)
+        else:
+            data = get_system_info(snapshot)
+            emitter.emit(telemetry_event, data)
+
+def send_inventory(public_ip):
+    """Sends the static system inventory once per connection in delta mode."""
+    if telemetry_mode != 'delta':
+        return
+    inventory = telemetry.collect_inventory()
+    inventory['PublicIP'] = public_ip
+    delta_encoder.reset()
+    emitter.emit(inventory_event, {'inventory': inventory, 'schema': telemetry.schema(), 'agent_name': core.agent_name})
+
+@sio.event
+def handle_get_system_info():
+    data = get_system_info()
+    emitter.emit('system_info_response', data)
+
+def _rate_status():
+    if rate_controller is None:
+        return {'interval': sampler.interval, 'adaptive': False}
+    return dict(rate_controller.stats(), adaptive=True)
+
+@sio.event
+def subscribe_telemetry(data=None):
+    """Marks the agent as watched: {'subscriber', 'interval', 'ttl'} are all optional."""
+    data = data or {}
+    if rate_controller is not None:
+        rate_controller.subscribe(data.get('subscriber', 'master'), data.get('interval'), data.get('ttl'))
+    emitter.emit('subscribe_telemetry_result', _rate_status())
+
+@sio.event
+def unsubscribe_telemetry(data=None):
+    data = data or {}
+    if rate_controller is not None:
+        rate_controller.unsubscribe(data.get('subscriber', 'master'))
+    emitter.emit('unsubscribe_telemetry_result', _rate_status())
+
+def send_top_processes(snapshot):
+    emitter.emit('top_processes', snapshot)
+
+@sio.event
+def get_top_processes():
+    snapshot = process_table.latest() if process_table is not None else None
+    if snapshot is None:
+        emitter.emit('get_top_processes_result', {'error': 'No process sample available'})
+        return
+    emitter.emit('get_top_processes_result', dict(snapshot, stats=process_table.stats()))
+
+def metrics_history():
+    from flask import request, jsonify
+
+    try:
+        resolution = int(request.args.get('resolution', 1))
+        end = float(request.args.get('end', time.time()))
+        start = float(request.args.get('start', end - 600))
+    except ValueError:
+        return jsonify({'error': 'resolution, start and end must be numbers'}), 400
+    series = request.args.get('series')
+    series = series.split(',') if series else None
+
+    try:
+        result = history.query(start, end, resolution, series)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'resolutions': history.resolutions}), 400
+    return jsonify(result)
+
+def configure(args):
+    global history, process_table, rate_controller, push, telemetry_mode, telemetry_event, inventory_event
+    push = args.push_telemetry
+    telemetry_mode = args.telemetry_mode
+    telemetry_event = args.telemetry_event
+    inventory_event = args.inventory_event
+    core.on_connect(send_inventory)
+
+    series = default_series()
+    if args.io_rates:
+        sampler.add_collector(iostats.IORates().update)
+        series += iostats.TOTAL_SERIES
+    if args.mount_interval:
+        mount_usage = iostats.MountUsage(args.mount_interval)
+        mount_usage.start()
+        sampler.add_collector(mount_usage.update)
+
+    history = MetricsHistory(series, budget_bytes=args.history_budget or DEFAULT_BUDGET_BYTES)
+    sampler.add_listener(history.record)
+    sampler.interval = args.sample_interval
+    if args.adaptive_rate:
+        rate_controller = ratecontrol.RateController(
+            sampler.set_interval,
+            ratecontrol.parse_profile(args.active_profile),
+            ratecontrol.parse_profile(args.idle_profile),
+            args.change_threshold,
+        )
+        sampler.add_listener(rate_controller.observe)
+        sampler.interval = rate_controller.interval
+        # Subscriptions belong to a master session
+        core.on_connect(lambda public_ip: rate_controller.clear())
+    sampler.start()
+
+    if args.process_top:
+        process_table = ProcessTable(top=args.process_top, sort=args.process_sort, interval=args.process_interval)
+
+    if core.app is not None:
+        core.app.add_url_rule('/metrics/history', 'metrics_history', metrics_history)
+
+def start(args):
+    if push:
+        threading.Thread(target=send_system_info, name='telemetry', daemon=True).start()
+    start_processes()
+
+def start_processes():
+    if process_table is not None:
+        if push:
+            process_table.add_listener(send_top_processes)
+        process_table.start()
+
+async def start_async(args):
+    """Pushes telemetry from the event loop when running under async_runtime."""
+    start_processes()
+    if not push:
+        return
+    from async_runtime import wait_for_samples
+
+    async for snapshot in wait_for_samples(sampler):
+        if telemetry_mode == 'delta':
+            emitter.emit(telemetry_event, delta_encoder.encode(snapshot, snapshot['Timestamp']), raw=True)
+        else:
+            emitter.emit(telemetry_event, get_system_info(snapshot))
@@ -0,0 +1,49 @@
+import core
+from packages import PackageQueue, AptBackend, FakeBackend, INSTALL, REMOVE
+
+sio = core.sio
+emitter = core.emitter
+
+# apt requests are serialised and coalesced into single transactions
+package_queue = PackageQueue()
+
+@sio.event
+def install_service(service_name):
+    print(f"Queueing install of {service_name}...")
+    package_queue.submit(INSTALL, service_name)
+
+@sio.event
+def uninstall_service(service_name):
+    print(f"Queueing removal of {service_name}...")
+    package_queue.submit(REMOVE, service_name)
+
+def on_package_progress(package, stage):
+    emitter.emit('package_progress', {'service_name': package, 'stage': stage})
+
+def on_package_done(package, action, ok, output, superseded=False):
+    """Reports each package with the same events the per-package apt calls used."""
+    print(output)
+    event = 'install_service_result' if action == INSTALL else 'uninstall_service_result'
+    if superseded:
+        emitter.emit(event, {'error': output, 'service_name': package, 'superseded': True})
+        return
+    services = core.capability('services')
+    if services is not None:
+        services.service_provider.invalidate()
+    if ok:
+        emitter.emit(event, {'result': output, 'service_name': package})
+    else:
+        emitter.emit(event, {'error': output, 'service_name': package})
+
+@sio.event
+def get_package_queue_stats():
+    emitter.emit('package_queue_stats_result', package_queue.stats())
+
+def configure(args):
+    package_queue.backend = FakeBackend() if args.package_backend == 'fake' else AptBackend()
+    package_queue.on_progress = on_package_progress
+    package_queue.on_done = on_package_done
+    package_queue.start()
+
+def start(args):
+    pass
@@ -0,0 +1,106 @@
+import threading
+import subprocess
+
+import core
+from services import ServiceStatusProvider, DEFAULT_PARALLELISM, control_units
+
+sio = core.sio
+emitter = core.emitter
+
+# systemd unit states, queried in one batch and cached
+service_provider = ServiceStatusProvider()
+
+@sio.event
+def get_service_status(units=None):
+    """Reports the configured units (or the given list) from one cached systemctl query."""
+    try:
+        services = service_provider.get(units)
+    except OSError as e:
+        print(e)
+        emitter.emit("get_service_status_result", {'error': str(e)})
+        return
+    emitter.emit("get_service_status_result", services, raw=True)
+
+def on_service_change(changed):
+    """Pushes unit state changes found by the service watcher."""
+    if core.connected():
+        emitter.emit("service_status_changed", changed, raw=True)
+
+@sio.event
+def get_ports_event():
+    result = ufw.status()
+    emitter.emit("ports_info", {"result": result})
+
+@sio.event
+def bulk_service_control(data):
+    """Applies one action to many units: {'action', 'units' or 'groups', 'parallelism', 'stop_on_failure'}."""
+    groups = data.get('groups') or [data.get('units', [])]
+    parallelism = int(data.get('parallelism', DEFAULT_PARALLELISM))
+
+    def run():
+        try:
+            report = control_units(groups, data.get('action'), parallelism, bool(data.get('stop_on_failure')))
+        except ValueError as e:
+            emitter.emit('bulk_service_control_result', {'error': str(e), 'data': data})
+            return
+        service_provider.invalidate()
+        report['request_id'] = data.get('request_id')
+        emitter.emit('bulk_service_control_result', report)
+
+    threading.Thread(target=run, name='bulk-service-control', daemon=True).start()
+
+@sio.event
+def start_service(service_name):
+    try:
+        result = f"Starting {service_name}..."
+        print(result)
+        start_command = f"sudo systemctl start {service_name}"
+        output = subprocess.check_output(start_command, shell=True, stderr=subprocess.STDOUT)
+        output_str = output.decode('utf-8').strip()
+        print(output_str)
+        service_provider.invalidate()
+        emitter.emit('start_service_result', {'result': output_str, 'service_name': service_name})
+    except subprocess.CalledProcessError as e:
+        print(e.output.decode('utf-8').strip())
+        emitter.emit('start_service_result', {'error': e.output.decode('utf-8').strip()})
+
+@sio.event
+def stop_service(service_name):
+    try:
+        result = f"Stopping {service_name}..."
+        print(result)
+        stop_command = f"sudo systemctl stop {service_name}"
+        output = subprocess.check_output(stop_command, shell=True, stderr=subprocess.STDOUT)
+        output_str = output.decode('utf-8').strip()
+        print(output_str)
+        service_provider.invalidate()
+        emitter.emit('stop_service_result', {'result': output_str, 'service_name': service_name})
+    except subprocess.CalledProcessError as e:
+        print(e.output.decode('utf-8').strip())
+        emitter.emit('stop_service_result', {'error': e.output.decode('utf-8').strip()})
+
+@sio.event
+def restart_service(service_name):
+    try:
+        result = f"Restarting {service_name}..."
+        print(result)
+        restart_command = f"sudo systemctl restart {service_name}"
+        output = subprocess.check_output(restart_command, shell=True, stderr=subprocess.STDOUT)
+        output_str = output.decode('utf-8').strip()
+        print(output_str)
+        service_provider.invalidate()
+        emitter.emit('restart_service_result', {'result': output_str, 'service_name': service_name})
+    except subprocess.CalledProcessError as e:
+        print(e.output.decode('utf-8').strip())
+        emitter.emit('restart_service_result', {'error': e.output.decode('utf-8').strip()})
+
+def configure(args):
+    if args.services:
+        service_provider.units = [unit for unit in args.services.split(',') if unit]
+    if args.service_watch_interval is not None:
+        service_provider.watch_interval = args.service_watch_interval
+    service_provider.add_listener(on_service_change)
+    service_provider.start()
+
+def start(args):
+    pass
@@ -0,0 +1,91 @@
+import socketio
+
+from emitter import BatchEmitter
+from ipresolver import PublicAddressResolver, make_source
+
+# SocketIO client setup
+sio = socketio.Client()
+
+# Outbound events go through the emitter so they can be batched
+emitter = BatchEmitter(sio)
+
+# Public address is resolved in the background; configured by agent.main
+ip_resolver = PublicAddressResolver()
+
+agent_name = None
+
+# Enabled capability modules by name, filled in by agent.main
+capabilities = {}
+
+# Flask app for the HTTP API; only created when a capability needs it
+app = None
+
+_connect_hooks = []
+
+
+def configure(args):
+    """Applies the core settings shared by every capability."""
+    global agent_name
+    agent_name = args.agent_name
+
+    emitter.max_batch = args.batch_size
+    emitter.max_age = args.batch_age
+    emitter.start()
+
+    ip_resolver.source = make_source(args.ip_source)
+    ip_resolver.ttl = args.ip_ttl
+    ip_resolver.add_listener(on_public_ip_change)
+    ip_resolver.start()
+
+
+def get_app():
+    """Returns the Flask app, importing Flask and creating the app on first use."""
+    global app
+    if app is None:
+        from flask import Flask, jsonify
+        from flask_cors import CORS
+
+        app = Flask(__name__)
+        CORS(app, resources={r"/*": {"origins": "*"}})
+        app.add_url_rule('/metrics/emitter', 'emitter_stats', lambda: jsonify(emitter.stats()))
+    return app
+
+
+def capability(name):
+    """Returns the loaded capability module, or None if it is not enabled."""
+    return capabilities.get(name)
+
+
+def on_connect(callback):
+    """Registers `callback(public_ip)` to run after agent_details on every (re)connect."""
+    _connect_hooks.append(callback)
+
+
+def connected():
+    """True while connected to the master, whichever runtime owns the connection."""
+    return emitter.sio.connected
+
+
+def get_public_ip():
+    """Return the cached public IP address of the agent (None until first resolved)."""
+    return ip_resolver.get()
+
+
+def on_public_ip_change(public_ip):
+    """Re-announce the agent when its public address changes."""
+    if connected():
+        emitter.emit('agent_details', {'public_ip': public_ip, 'agent_name': agent_name})
+
+
+@sio.event
+def connect():
+    public_ip = get_public_ip()
+    if public_ip:
+        emitter.emit('agent_details', {'public_ip': public_ip, 'agent_name': agent_name})
+    for callback in _connect_hooks:
+        callback(public_ip)
+
+
+@sio.event
+def get_emitter_stats():
+    emitter.emit('emitter_stats_result', emitter.stats())
@@ -0,0 +1,248 @@
+import os
+import errno
+import ctypes
+import ctypes.util
+import struct
+import secrets
+import threading
+from collections import OrderedDict
+
+from listing import iter_entries
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough per-entry cost of a cached listing record (dict plus its values)
+ENTRY_OVERHEAD = 400
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT = struct.Struct('iIII')
+
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify; `available` is False elsewhere."""
+
+    def __init__(self):
+        self.fd = -1
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            pass
+
+    @property
+    def available(self):
+        return self.fd >= 0
+
+    def add_watch(self, path, mask):
+        """Returns the watch descriptor, or raises OSError (ENOSPC once the watch limit is hit)."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Blocks until events arrive and yields (wd, mask, name) for each."""
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+
+class _Entry:
+    __slots__ = ('files', 'etag', 'size', 'watched', 'mtime_ns')
+
+    def __init__(self, files, etag, watched, mtime_ns):
+        self.files = files
+        self.etag = etag
+        self.size = ENTRY_OVERHEAD * (len(files) + 1) + sum(len(f['name']) for f in files)
+        self.watched = watched
+        self.mtime_ns = mtime_ns
+
+
+class DirectoryCache:
+    """LRU cache of directory listings bounded by an estimated memory size.
+
+    Directories are watched with inotify and dropped from the cache, watch
+    included, as soon as anything inside them changes, so a hit costs no
+    filesystem work at all and only cached directories hold a watch.
+    When inotify is unavailable or the watch limit is reached, entries fall
+    back to comparing the directory's mtime on each lookup (one stat call),
+    which catches entries being added, removed or renamed.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Scans in flight per path, and how often the path changed during them
+        self._scans = {}
+        self._versions = {}
+        self._watches = {}
+        self._watch_paths = {}
+        self._lock = threading.Lock()
+        self._token = secrets.token_hex(4)
+        self._counter = 0
+
+        self._inotify = Inotify()
+        if self._inotify.available:
+            threading.Thread(target=self._watch_loop, name='dircache-inotify', daemon=True).start()
+
+    def _valid(self, path, entry):
+        if entry.watched:
+            return True
+        try:
+            return os.stat(path).st_mtime_ns == entry.mtime_ns
+        except OSError:
+            return False
+
+    def etag(self, directory):
+        """Returns the ETag of a still-valid cached listing, or None."""
+        path = os.path.normpath(directory)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or not self._valid(path, entry):
+            return None
+        return entry.etag
+
+    def get(self, directory):
+        """Returns (etag, files) for `directory`, scanning it only on a miss."""
+        path = os.path.normpath(directory)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+        if entry is not None and self._valid(path, entry):
+            self.hits += 1
+            return entry.etag, entry.files
+
+        self.misses += 1
+        with self._lock:
+            self._scans[path] = self._scans.get(path, 0) + 1
+            version = self._versions.get(path, 0)
+        try:
+            # Watch before scanning so a change during the scan is not missed
+            watched = self._watch(path)
+            mtime_ns = os.stat(path).st_mtime_ns
+            files = list(iter_entries(path))
+        except OSError:
+            with self._lock:
+                self._end_scan(path)
+            raise
+
+        with self._lock:
+            self._counter += 1
+            entry = _Entry(files, f"{self._token}-{self._counter}", watched, mtime_ns)
+            unchanged = self._versions.get(path, 0) == version
+            self._end_scan(path)
+            if unchanged and entry.size <= self.max_bytes:
+                self._drop(path)
+                self._entries[path] = entry
+                self.size += entry.size
+                self._evict()
+            elif path not in self._entries and path not in self._scans:
+                self._unwatch(path)
+        return entry.etag, files
+
+    def invalidate(self, directory):
+        path = os.path.normpath(directory)
+        with self._lock:
+            self._changed(path)
+
+    def _end_scan(self, path):
+        count = self._scans.pop(path) - 1
+        if count:
+            self._scans[path] = count
+        else:
+            self._versions.pop(path, None)
+
+    def _changed(self, path):
+        """Drops the entry and its watch; the next miss scans and watches the directory again."""
+        if path in self._scans:
+            self._versions[path] = self._versions.get(path, 0) + 1
+        self._drop(path)
+        self._unwatch(path)
+
+    def _drop(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _unwatch(self, path):
+        wd = self._watches.pop(path, None)
+        if wd is not None:
+            self._watch_paths.pop(wd, None)
+            self._inotify.rm_watch(wd)
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._entries:
+            path, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+            self._unwatch(path)
+
+    def _watch(self, path):
+        if not self._inotify.available:
+            return False
+        with self._lock:
+            if path in self._watches:
+                return True
+        try:
+            wd = self._inotify.add_watch(path, WATCH_MASK)
+        except OSError as e:
+            if e.errno != errno.ENOSPC:
+                print(f"Error watching {path}: {e}")
+            return False
+        with self._lock:
+            self._watches[path] = wd
+            self._watch_paths[wd] = path
+        return True
+
+    def _watch_loop(self):
+        while True:
+            try:
+                events = list(self._inotify.read_events())
+            except OSError as e:
+                print(f"Error reading inotify events: {e}")
+                return
+            for wd, mask, _ in events:
+                with self._lock:
+                    path = self._watch_paths.get(wd)
+                    if path is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        # The kernel already removed this watch
+                        self._watch_paths.pop(wd, None)
+                        self._watches.pop(path, None)
+                    self._changed(path)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'watches': len(self._watches),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,209 @@
+import os
+import stat
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_DIRS = 200000
+
+# Directory mtimes only change when entries are added, removed or renamed, so
+# growing files are picked up by rescanning cached directories after this long
+DEFAULT_MAX_AGE = 600
+
+
+class _Node:
+    """What one directory contributes on its own, excluding its subdirectories."""
+    __slots__ = ('mtime', 'scanned', 'size', 'apparent', 'links', 'subdirs', 'errors')
+
+    def __init__(self, mtime, scanned):
+        self.mtime = mtime
+        self.scanned = scanned
+        self.size = 0
+        self.apparent = 0
+        # (inode, size, apparent) of files with more than one link, counted once per query
+        self.links = []
+        self.subdirs = []
+        self.errors = 0
+
+
+def _usage(st):
+    return st.st_blocks * 512, st.st_size
+
+
+class DiskUsage:
+    """Recursive directory sizes, computed by a parallel walker and cached per directory.
+
+    Each directory is scanned on its own worker; only its entries are lstat'ed
+    and the subdirectories on the same device are queued, so the walk never
+    crosses into other filesystems or follows symlinks. A directory whose
+    mtime is unchanged (and whose scan is younger than `max_age`) is taken from
+    the cache without reading it, which makes repeat queries incremental.
+    Files with several hard links are counted once per query.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_dirs=DEFAULT_MAX_DIRS, max_age=DEFAULT_MAX_AGE):
+        self.workers = workers
+        self.max_dirs = max_dirs
+        self.max_age = max_age
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='du')
+
+    def _cached(self, path, mtime):
+        with self._lock:
+            node = self._cache.get(path)
+            if node is None or node.mtime != mtime or time.monotonic() - node.scanned > self.max_age:
+                return None
+            self._cache.move_to_end(path)
+            return node
+
+    def _store(self, path, node):
+        with self._lock:
+            self._cache[path] = node
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_dirs:
+                self._cache.popitem(last=False)
+
+    def _node(self, path, dev, refresh):
+        """Returns (node, from_cache) for one directory."""
+        st = os.lstat(path)
+        if not refresh:
+            node = self._cached(path, st.st_mtime_ns)
+            if node is not None:
+                return node, True
+
+        node = _Node(st.st_mtime_ns, time.monotonic())
+        node.size, node.apparent = _usage(st)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        est = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        node.errors += 1
+                        continue
+                    if stat.S_ISDIR(est.st_mode):
+                        if est.st_dev == dev:
+                            node.subdirs.append(entry.name)
+                        continue
+                    size, apparent = _usage(est)
+                    if est.st_nlink > 1:
+                        node.links.append((est.st_ino, size, apparent))
+                    else:
+                        node.size += size
+                        node.apparent += apparent
+        except OSError:
+            node.errors += 1
+        self._store(path, node)
+        return node, False
+
+    def walk(self, root, refresh=False):
+        """Yields a record per top-level entry of `root` as soon as its subtree is done, then the total.
+
+        Entry records are {'name', 'path', 'type', 'size', 'apparent_size',
+        'dirs'}; the last record is {'total', 'complete': True, ...}.
+        """
+        started = time.monotonic()
+        root = os.path.abspath(root)
+        root_st = os.lstat(root)
+        if not stat.S_ISDIR(root_st.st_mode):
+            raise NotADirectoryError(root)
+        dev = root_st.st_dev
+
+        nodes = {}
+        seen_links = set()
+        scanned = cached = 0
+        # Directories still outstanding under each top-level subdirectory
+        outstanding = {}
+
+        def summarize(top):
+            size = apparent = dirs = 0
+            stack = [top]
+            while stack:
+                path = stack.pop()
+                node = nodes[path]
+                dirs += 1
+                size += node.size
+                apparent += node.apparent
+                for ino, link_size, link_apparent in node.links:
+                    if ino not in seen_links:
+                        seen_links.add(ino)
+                        size += link_size
+                        apparent += link_apparent
+                stack.extend(os.path.join(path, name) for name in node.subdirs)
+            return size, apparent, dirs
+
+        root_node, from_cache = self._node(root, dev, refresh)
+        nodes[root] = root_node
+        scanned += 1
+        cached += from_cache
+        errors = root_node.errors
+        total_size, total_apparent = root_node.size, root_node.apparent
+
+        # Top-level files first: they need no walking
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        est = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(est.st_mode):
+                        continue
+                    size, apparent = _usage(est)
+                    if est.st_nlink > 1:
+                        if est.st_ino in seen_links:
+                            size = apparent = 0
+                        seen_links.add(est.st_ino)
+                        total_size += size
+                        total_apparent += apparent
+                    yield {'name': entry.name, 'path': entry.path, 'type': 'file',
+                           'size': size, 'apparent_size': apparent, 'dirs': 0}
+        except OSError:
+            pass
+
+        pending = {}
+        for name in root_node.subdirs:
+            path = os.path.join(root, name)
+            outstanding[path] = 1
+            pending[self._pool.submit(self._node, path, dev, refresh)] = (path, path)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, top = pending.pop(future)
+                try:
+                    node, from_cache = future.result()
+                except OSError:
+                    # Removed while walking
+                    node, from_cache = _Node(0, time.monotonic()), False
+                    node.errors = 1
+                nodes[path] = node
+                scanned += 1
+                cached += from_cache
+                errors += node.errors
+                outstanding[top] += len(node.subdirs) - 1
+                for name in node.subdirs:
+                    child = os.path.join(path, name)
+                    pending[self._pool.submit(self._node, child, dev, refresh)] = (child, top)
+                if outstanding[top] == 0:
+                    size, apparent, dirs = summarize(top)
+                    total_size += size
+                    total_apparent += apparent
+                    yield {'name': os.path.basename(top) + '/', 'path': top, 'type': 'directory',
+                           'size': size, 'apparent_size': apparent, 'dirs': dirs}
+
+        yield {
+            'total': {'size': total_size, 'apparent_size': total_apparent},
+            'complete': True,
+            'scanned_dirs': scanned,
+            'cached_dirs': cached,
+            'errors': errors,
+            'duration': round(time.monotonic() - started, 3),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {'cached_dirs': len(self._cache), 'max_dirs': self.max_dirs, 'workers': self.workers}
@@ -0,0 +1,90 @@
+import os
+import zlib
+import mimetypes
+
+from flask import Response
+
+READ_BUFFER = 256 * 1024
+
+# Content types worth compressing; everything else is sent as-is
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/xml', 'application/javascript',
+                      'application/x-sh', 'application/x-yaml', 'image/svg+xml')
+COMPRESSIBLE_SUFFIXES = ('.log', '.conf', '.cfg', '.ini', '.yaml', '.yml', '.toml', '.csv', '.md')
+
+
+def _zstd():
+    """Optional zstandard module, or None if it is not installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def is_compressible(path):
+    mimetype, _ = mimetypes.guess_type(path)
+    if mimetype and mimetype.startswith(COMPRESSIBLE_TYPES):
+        return True
+    return path.lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def negotiate_encoding(requested, accept_encoding, path):
+    """Picks 'zstd' or 'gzip' when the client opted in with ?compress= and accepts it, else None.
+
+    `requested` is the query value: 'gzip', 'zstd', or anything truthy for
+    whichever the client prefers.
+    """
+    if not requested or requested in ('0', 'false', 'no') or not is_compressible(path):
+        return None
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    candidates = [requested] if requested in ('gzip', 'zstd') else ['zstd', 'gzip']
+    for encoding in candidates:
+        if encoding not in accepted:
+            continue
+        if encoding == 'zstd' and _zstd() is None:
+            continue
+        return encoding
+    return None
+
+
+def _iter_compressed(path, encoding):
+    if encoding == 'zstd':
+        compressor = _zstd().ZstdCompressor(level=3).compressobj()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BUFFER)
+            if not block:
+                break
+            data = compressor.compress(block)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def compressed_response(request, path, encoding, as_attachment=True):
+    """Streams `path` compressed with `encoding`, honouring ETag and Last-Modified validators.
+
+    The compressed body has no stable length, so it is sent without
+    Content-Length and without range support (Accept-Ranges: none).
+    """
+    st = os.stat(path)
+    etag = f"{st.st_mtime_ns:x}-{st.st_size:x}-{encoding}"
+    response = Response(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.last_modified = int(st.st_mtime)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Accept-Ranges'] = 'none'
+    if as_attachment:
+        response.headers['Content-Disposition'] = f'attachment; filename="{os.path.basename(path)}"'
+
+    not_modified = request.if_none_match.contains(etag) if request.if_none_match else (
+        request.if_modified_since is not None and int(st.st_mtime) <= request.if_modified_since.timestamp())
+    if not_modified:
+        response.status_code = 304
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    response.response = _iter_compressed(path, encoding)
+    return response
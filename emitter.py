@@ -0,0 +1,165 @@
+import json
+import time
+import threading
+from collections import deque
+
+# Event priorities: IMMEDIATE bypasses batching entirely, the others are
+# queued and ordered NORMAL before BULK inside each batch.
+IMMEDIATE = 0
+NORMAL = 1
+BULK = 2
+
+BATCH_EVENT = 'batch'
+
+
+def default_priority(event):
+    """Command/service results, alerts and handshake events go out at once; telemetry is bulk."""
+    if event.endswith('_result') or event in ('agent_details', 'system_inventory', 'alert', 'alert_resolved'):
+        return IMMEDIATE
+    if event in ('system_info', 'system_info_response', 'top_processes'):
+        return BULK
+    return NORMAL
+
+
+class BatchEmitter:
+    """Coalesces outbound Socket.IO events into batches flushed by size or age.
+
+    With `max_batch` <= 1 batching is off and every event is emitted on its
+    own exactly as before (JSON-encoded unless `raw`). With batching on, queued
+    events are sent as one `batch` event whose payload is a list of
+    [event, data] pairs, so the whole batch costs a single serialisation and a
+    single Engine.IO packet. IMMEDIATE events are never queued, but whatever
+    is queued is flushed before them so they never overtake earlier events
+    (a command's last output lines arrive before its result).
+    """
+
+    def __init__(self, sio, max_batch=1, max_age=0.25, priorities=None, batch_event=BATCH_EVENT):
+        self.sio = sio
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.priorities = dict(priorities or {})
+        self.batch_event = batch_event
+        self._queues = {NORMAL: deque(), BULK: deque()}
+        self._pending = 0
+        self._oldest = None
+        self._cond = threading.Condition()
+        # Held from taking a batch until it is sent, so sends keep the order events were emitted in
+        self._send_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.batches_sent = 0
+        self.events_batched = 0
+        self.events_immediate = 0
+        self.max_batch_seen = 0
+        self.flush_latency_total = 0.0
+        self.flush_latency_max = 0.0
+
+    @property
+    def batching(self):
+        return self.max_batch > 1
+
+    def priority(self, event):
+        return self.priorities.get(event, default_priority(event))
+
+    def start(self):
+        if self.batching and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='batch-emitter', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def emit(self, event, data, raw=False):
+        """Sends `data` under `event`; `raw` payloads (bytes, lists) skip the JSON encoding."""
+        priority = self.priority(event)
+        if not self.batching:
+            self.events_immediate += 1
+            self.sio.emit(event, data if raw else json.dumps(data))
+            return
+        if priority == IMMEDIATE:
+            with self._send_lock:
+                self._flush()
+                self.events_immediate += 1
+                self.sio.emit(event, data if raw else json.dumps(data))
+            return
+
+        with self._cond:
+            if self._pending == 0:
+                self._oldest = time.monotonic()
+            self._queues[priority].append([event, data])
+            self._pending += 1
+            # Wake the flusher to start the age timer or to flush a full batch
+            if self._pending == 1 or self._pending >= self.max_batch:
+                self._cond.notify()
+
+    def _take(self):
+        batch = []
+        for priority in (NORMAL, BULK):
+            batch.extend(self._queues[priority])
+            self._queues[priority].clear()
+        oldest = self._oldest
+        self._pending = 0
+        self._oldest = None
+        return batch, oldest
+
+    def flush(self):
+        """Sends whatever is queued right now as one batch."""
+        with self._send_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._cond:
+            if self._pending == 0:
+                return
+            batch, oldest = self._take()
+        self._send(batch, oldest)
+
+    def _send(self, batch, oldest):
+        try:
+            self.sio.emit(self.batch_event, batch)
+        except Exception as e:
+            print(f"Error emitting batch: {e}")
+            return
+        latency = time.monotonic() - oldest
+        self.batches_sent += 1
+        self.events_batched += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.flush_latency_total += latency
+        self.flush_latency_max = max(self.flush_latency_max, latency)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while self._pending < self.max_batch and not self._stop.is_set():
+                    if self._pending:
+                        remaining = self._oldest + self.max_age - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+            self.flush()
+
+    def stats(self):
+        """Counters for batch size and flush latency."""
+        batches = self.batches_sent
+        return {
+            'batching': self.batching,
+            'max_batch': self.max_batch,
+            'max_age': self.max_age,
+            'pending': self._pending,
+            'batches_sent': batches,
+            'events_batched': self.events_batched,
+            'events_immediate': self.events_immediate,
+            'avg_batch_size': self.events_batched / batches if batches else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'avg_flush_latency': self.flush_latency_total / batches if batches else 0.0,
+            'max_flush_latency': self.flush_latency_max,
+        }
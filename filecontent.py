@@ -0,0 +1,128 @@
+import os
+import mmap
+from contextlib import contextmanager
+
+# Upper bound on what one /get_content response returns, whatever the mode
+MAX_CHUNK = 1024 * 1024
+DEFAULT_LINES = 100
+
+MODES = ('bytes', 'head', 'tail', 'page')
+
+
+@contextmanager
+def _mapped(path):
+    """Read-only mmap of `path`, or None for an empty file (which cannot be mapped)."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield None, 0
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm, size
+
+
+def _decode(data):
+    return data.decode('utf-8', errors='ignore')
+
+
+def _continuation(mm, pos):
+    return 0x80 <= mm[pos] < 0xC0
+
+
+def _char_boundary(mm, start, end, size):
+    """Moves a window end that falls inside a UTF-8 sequence back to where it starts.
+
+    If the window holds nothing but part of one character, the end moves
+    forward past it instead, so a cursor always makes progress. At most 3
+    bytes are skipped either way, which bounds the work on binary files.
+    """
+    if mm is None or end >= size or not _continuation(mm, end):
+        return end
+    boundary = end
+    while boundary > max(start, end - 3) and _continuation(mm, boundary):
+        boundary -= 1
+    if boundary > start:
+        return boundary
+    while end < min(size, start + 4) and _continuation(mm, end):
+        end += 1
+    return end
+
+
+def _result(mm, start, end, size):
+    end = _char_boundary(mm, start, end, size)
+    data = mm[start:end] if mm is not None else b''
+    return {
+        'content': _decode(data),
+        'offset': start,
+        'end': end,
+        'size': size,
+        'next_cursor': end if end < size else None,
+    }
+
+
+def _forward_lines(mm, start, lines, size):
+    """Byte offset just past `lines` newlines from `start`, capped at MAX_CHUNK bytes."""
+    limit = min(start + MAX_CHUNK, size)
+    end = start
+    for _ in range(lines):
+        newline = mm.find(b'\n', end, limit)
+        if newline < 0:
+            return limit
+        end = newline + 1
+    return end
+
+
+def read_range(path, offset=0, length=MAX_CHUNK):
+    """Returns `length` bytes from `offset` (at most MAX_CHUNK)."""
+    with _mapped(path) as (mm, size):
+        start = min(max(offset, 0), size)
+        end = min(start + min(length, MAX_CHUNK), size)
+        return _result(mm, start, end, size)
+
+
+def read_lines(path, cursor=0, lines=DEFAULT_LINES):
+    """Returns `lines` lines starting at byte `cursor`; head mode is cursor 0."""
+    with _mapped(path) as (mm, size):
+        start = min(max(cursor, 0), size)
+        if mm is None:
+            return _result(mm, 0, 0, size)
+        return _result(mm, start, _forward_lines(mm, start, lines, size), size)
+
+
+def read_tail(path, lines=DEFAULT_LINES):
+    """Returns the last `lines` lines, scanning backwards from the end of the file."""
+    with _mapped(path) as (mm, size):
+        if mm is None:
+            return _result(mm, 0, 0, size)
+        floor = max(size - MAX_CHUNK, 0)
+        # A trailing newline terminates the last line rather than starting a new one
+        end = size - 1 if mm[size - 1:size] == b'\n' else size
+        start = end
+        for _ in range(lines):
+            newline = mm.rfind(b'\n', floor, start)
+            if newline < 0:
+                start = floor
+                break
+            start = newline
+        else:
+            start += 1
+        # With lines=0 (or only a trailing newline) nothing is selected
+        start = min(start, size)
+        return _result(mm, start, size, size)
+
+
+def read_content(path, mode='bytes', offset=0, length=MAX_CHUNK, lines=DEFAULT_LINES):
+    """Dispatches a /get_content request to the matching reader."""
+    if length <= 0:
+        raise ValueError(f"length must be positive: {length}")
+    if lines < 0:
+        raise ValueError(f"lines must not be negative: {lines}")
+    if mode == 'bytes':
+        return read_range(path, offset, length)
+    if mode == 'head':
+        return read_lines(path, 0, lines)
+    if mode == 'page':
+        return read_lines(path, offset, lines)
+    if mode == 'tail':
+        return read_tail(path, lines)
+    raise ValueError(f"Unknown mode: {mode}")
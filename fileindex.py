@@ -0,0 +1,322 @@
+import os
+import gzip
+import json
+import time
+import threading
+from array import array
+
+SNAPSHOT_VERSION = 1
+
+# Kernel and runtime pseudo filesystems; never worth indexing
+DEFAULT_EXCLUDE = ('/proc', '/sys', '/dev', '/run')
+
+DEFAULT_INTERVAL = 300
+DEFAULT_LIMIT = 50
+
+# Rebuild the trigram postings once this share of entries has been deleted
+COMPACT_RATIO = 0.25
+
+
+def trigrams(name):
+    name = name.lower()
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def rank(name, query):
+    """Lower is better: exact name, prefix, match after a separator, anywhere."""
+    name = name.lower()
+    if name == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    pos = name.find(query)
+    if pos > 0 and not name[pos - 1].isalnum():
+        return 2
+    return 3
+
+
+class _Dir:
+    __slots__ = ('id', 'mtime', 'children')
+
+    def __init__(self, dir_id, mtime):
+        self.id = dir_id
+        self.mtime = mtime
+        # name -> entry id
+        self.children = {}
+
+
+class FileIndex:
+    """Filename index over a set of roots, searched by substring in milliseconds.
+
+    Entries are kept as parallel arrays (name, parent directory, is-dir) and
+    every name's lowercase trigrams map to the ids of the entries holding them,
+    so a query only verifies the candidates of its rarest trigram. The first
+    scan walks the roots with os.scandir; later refreshes stat every known
+    directory and rescan only those whose mtime changed, which is what a
+    create, delete or rename inside them updates. Deleted entries become
+    tombstones until enough accumulate to rebuild the postings.
+
+    The directory tree is saved to `snapshot_path` (gzip'd JSON) after each
+    change, and loaded on start so search works before the first refresh.
+    """
+
+    def __init__(self, roots, snapshot_path=None, interval=DEFAULT_INTERVAL, exclude=DEFAULT_EXCLUDE):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.exclude = set(exclude)
+        if snapshot_path:
+            # Saving the snapshot changes its directory, which would otherwise force a save on every refresh
+            self.exclude.add(os.path.dirname(os.path.abspath(snapshot_path)))
+        self.ready = False
+        self.last_scan = None
+        self.scan_duration = None
+
+        self._names = []
+        self._parents = array('I')
+        self._is_dir = bytearray()
+        self._deleted = 0
+        self._postings = {}
+        self._dir_paths = []
+        self._dirs = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Building
+
+    def _add_entry(self, name, parent_id, is_dir):
+        entry_id = len(self._names)
+        self._names.append(name)
+        self._parents.append(parent_id)
+        self._is_dir.append(is_dir)
+        for gram in trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(entry_id)
+        return entry_id
+
+    def _remove_entry(self, entry_id):
+        self._names[entry_id] = None
+        self._deleted += 1
+
+    def _add_dir(self, path, mtime):
+        state = _Dir(len(self._dir_paths), mtime)
+        self._dir_paths.append(path)
+        self._dirs[path] = state
+        return state
+
+    def _drop_dir(self, path):
+        state = self._dirs.pop(path, None)
+        if state is None:
+            return
+        for name, entry_id in state.children.items():
+            if self._is_dir[entry_id]:
+                self._drop_dir(os.path.join(path, name))
+            self._remove_entry(entry_id)
+
+    def _scan_dir(self, path, state, pending):
+        """Reconciles the children of one directory with what is on disk; returns False if it could not be read."""
+        try:
+            with os.scandir(path) as it:
+                found = {}
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    found[entry.name] = is_dir
+        except OSError:
+            return False
+        with self._lock:
+            for name in list(state.children):
+                entry_id = state.children[name]
+                if found.get(name) != bool(self._is_dir[entry_id]):
+                    if self._is_dir[entry_id]:
+                        self._drop_dir(os.path.join(path, name))
+                    self._remove_entry(entry_id)
+                    del state.children[name]
+            for name, is_dir in found.items():
+                if name not in state.children:
+                    state.children[name] = self._add_entry(name, state.id, is_dir)
+                    if is_dir:
+                        pending.append(os.path.join(path, name))
+        return True
+
+    def _walk(self, paths):
+        pending = list(paths)
+        while pending and not self._stop.is_set():
+            path = pending.pop()
+            if path in self.exclude:
+                continue
+            try:
+                mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+            except OSError:
+                continue
+            with self._lock:
+                state = self._dirs.get(path) or self._add_dir(path, mtime)
+            self._scan_dir(path, state, pending)
+
+    def scan(self):
+        """Walks the roots completely (used when there is no snapshot)."""
+        started = time.monotonic()
+        self._walk(self.roots)
+        self._finish_scan(started)
+
+    def refresh(self):
+        """Rescans only the directories whose mtime changed since they were indexed."""
+        started = time.monotonic()
+        with self._lock:
+            known = list(self._dirs.items())
+        changed = []
+        for path, state in known:
+            try:
+                mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+            except OSError:
+                with self._lock:
+                    # Its parent's rescan removes the entry itself
+                    self._drop_dir(path)
+                continue
+            if mtime != state.mtime:
+                changed.append((path, state, mtime))
+        pending = [root for root in self.roots if root not in self._dirs]
+        for path, state, mtime in changed:
+            # Only a successful scan records the new mtime, so a failed one is retried next refresh
+            if self._scan_dir(path, state, pending):
+                state.mtime = mtime
+        self._walk(pending)
+        with self._lock:
+            if self._deleted > len(self._names) * COMPACT_RATIO:
+                self._compact()
+        self._finish_scan(started, bool(changed or pending))
+
+    def _finish_scan(self, started, changed=True):
+        self.scan_duration = round(time.monotonic() - started, 3)
+        self.last_scan = time.time()
+        self.ready = True
+        if changed and self.snapshot_path:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"Error saving file index snapshot: {e}")
+
+    def _compact(self):
+        """Rebuilds the arrays and postings without tombstones."""
+        dirs = [(path, state.mtime, [(name, bool(self._is_dir[entry_id])) for name, entry_id in state.children.items()])
+                for path, state in self._dirs.items()]
+        self._load_dirs(dirs)
+
+    def _load_dirs(self, dirs):
+        self._names, self._parents, self._is_dir = [], array('I'), bytearray()
+        self._deleted = 0
+        self._postings = {}
+        self._dir_paths, self._dirs = [], {}
+        for path, mtime, children in dirs:
+            state = self._add_dir(path, mtime)
+            for name, is_dir in children:
+                state.children[name] = self._add_entry(name, state.id, is_dir)
+
+    # Snapshot
+
+    def save(self):
+        """Writes the directory tree atomically to `snapshot_path`."""
+        with self._lock:
+            dirs = [[path, state.mtime, [[name, int(self._is_dir[entry_id])] for name, entry_id in state.children.items()]]
+                    for path, state in self._dirs.items()]
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        tmp = self.snapshot_path + '.tmp'
+        with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=1) as f:
+            json.dump({'version': SNAPSHOT_VERSION, 'roots': self.roots, 'dirs': dirs}, f, separators=(',', ':'))
+        os.replace(tmp, self.snapshot_path)
+
+    def load(self):
+        """Loads `snapshot_path` if it was written for the same roots; returns whether it did."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with gzip.open(self.snapshot_path, 'rt', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable file index snapshot: {e}")
+            return False
+        if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('roots') != self.roots:
+            return False
+        with self._lock:
+            self._load_dirs((path, mtime, [(name, bool(is_dir)) for name, is_dir in children])
+                            for path, mtime, children in snapshot['dirs'])
+        self.ready = True
+        return True
+
+    # Background refresh
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='file-index', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            if self.load():
+                self.refresh()
+            else:
+                self.scan()
+        except Exception as e:
+            print(f"Error building file index: {e}")
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing file index: {e}")
+
+    # Queries
+
+    def search(self, query, limit=DEFAULT_LIMIT, under=None, kind=None):
+        """Returns (total matches, best `limit` matches) for a case-insensitive substring of the name."""
+        query = query.lower()
+        if not query:
+            return 0, []
+        if under is not None:
+            under = os.path.abspath(under).rstrip('/') + '/'
+        with self._lock:
+            if len(query) >= 3:
+                postings = [self._postings.get(gram) for gram in trigrams(query)]
+                if any(p is None for p in postings):
+                    return 0, []
+                shortest = min(postings, key=len)
+                candidates = shortest[:]
+            else:
+                candidates = range(len(self._names))
+            # The arrays are only appended to or tombstoned in place (compaction swaps in new ones),
+            # so these references stay consistent while the candidates are checked without the lock
+            names, parents, is_dirs, dir_paths = self._names, self._parents, self._is_dir, self._dir_paths
+
+        matches = []
+        for entry_id in candidates:
+            name = names[entry_id]
+            if name is None or query not in name.lower():
+                continue
+            is_dir = bool(is_dirs[entry_id])
+            if kind is not None and is_dir != (kind == 'directory'):
+                continue
+            path = os.path.join(dir_paths[parents[entry_id]], name)
+            if under is not None and not path.startswith(under):
+                continue
+            matches.append((rank(name, query), path.count('/'), len(name), path, is_dir))
+        matches.sort()
+        return len(matches), [{'path': path, 'name': os.path.basename(path), 'type': 'directory' if is_dir else 'file'}
+                              for _, _, _, path, is_dir in matches[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'entries': len(self._names) - self._deleted,
+                'directories': len(self._dirs),
+                'trigrams': len(self._postings),
+                'last_scan': self.last_scan,
+                'scan_duration': self.scan_duration,
+            }
@@ -0,0 +1,376 @@
+import os
+import errno
+import shutil
+import uuid
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+COPY, MOVE, DELETE = 'copy', 'move', 'delete'
+ACTIONS = (COPY, MOVE, DELETE)
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_JOBS = 2
+DEFAULT_KEEP_FINISHED = 100
+
+# Per-path error lists are cut here so one unreadable tree cannot bloat the report
+MAX_ERRORS_PER_PATH = 20
+
+
+class FileOpError(Exception):
+    """Rejected request; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_root(path):
+    """True for anything that resolves to /, including '//', '/..' and symlinks or bind mounts of it."""
+    if os.path.realpath(path) == os.sep:
+        return True
+    try:
+        return os.path.samestat(os.stat(path), os.stat(os.sep))
+    except OSError:
+        return False
+
+
+def _tree(path):
+    """Lists a path as (directories top-down, [(file, size)], [unreadable directory errors]).
+
+    Symlinks count as files. A subdirectory that cannot be listed is
+    reported rather than skipped, so a transfer missing it is not a success.
+    """
+    st = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        return [], [(path, st.st_size)], []
+    dirs, files, unreadable = [], [], []
+    for dirpath, dirnames, filenames in os.walk(path, onerror=unreadable.append):
+        dirs.append(dirpath)
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                files.append((full, os.lstat(full).st_size))
+            except OSError:
+                files.append((full, 0))
+        # os.walk lists symlinks to directories as directories without entering them
+        for name in list(dirnames):
+            full = os.path.join(dirpath, name)
+            if os.path.islink(full):
+                dirnames.remove(name)
+                files.append((full, 0))
+    return dirs, files, unreadable
+
+
+def _remove(path):
+    """Deletes a file, symlink or whole directory tree; missing paths are fine."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class FileOpJob:
+    """One batch of copy, move or delete operations and its progress."""
+
+    def __init__(self, action, paths, destination=None, overwrite=False):
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.paths = paths
+        self.destination = destination
+        self.overwrite = overwrite
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.results = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def progress(self, files, size):
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+
+    def info(self, results=True):
+        with self._lock:
+            info = {
+                'job_id': self.id,
+                'action': self.action,
+                'status': self.status,
+                'destination': self.destination,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished,
+                'files_total': self.files_total,
+                'bytes_total': self.bytes_total,
+                'files_done': self.files_done,
+                'bytes_done': self.bytes_done,
+            }
+        if results:
+            info['results'] = self.results if self.finished else []
+        return info
+
+
+class FileOpManager:
+    """Runs batch file operations in the background with parallel file I/O.
+
+    A job first walks its paths to know the totals, then handles them one
+    after another while the files inside each tree are copied, moved or
+    unlinked on a shared pool of `workers` threads. Moves are a single
+    rename when source and destination share a filesystem and fall back to
+    copy-then-delete otherwise. An existing target is an error unless
+    `overwrite` is set, in which case it is replaced (never merged into) for
+    copies and moves alike: it is renamed aside, removed once the transfer
+    succeeds and put back if it fails or is cancelled; the path's result
+    then has 'replaced': True. `on_done(job)` is called when a job finishes.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_jobs=DEFAULT_MAX_JOBS,
+                 keep_finished=DEFAULT_KEEP_FINISHED, on_done=None):
+        self.keep_finished = keep_finished
+        self.on_done = on_done
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._io = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fileop-io')
+        self._runner = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='fileop')
+
+    def submit(self, action, paths, destination=None, overwrite=False):
+        if action not in ACTIONS:
+            raise FileOpError(f"Unsupported action: {action}")
+        if not paths:
+            raise FileOpError('No paths given')
+        paths = [os.path.normpath(path) for path in paths]
+        if any(_is_root(path) for path in paths):
+            raise FileOpError('Refusing to operate on the filesystem root', 403)
+        if action != DELETE:
+            if not destination or not os.path.isdir(destination):
+                raise FileOpError(f"Destination is not a directory: {destination}")
+            destination = os.path.normpath(destination)
+            if _is_root(destination):
+                raise FileOpError(f"Refusing to {action} into the filesystem root", 403)
+            real_destination = os.path.realpath(destination)
+            for path in paths:
+                real = os.path.realpath(path)
+                if real_destination == real or real_destination.startswith(real + os.sep):
+                    raise FileOpError(f"Cannot {action} {path} into itself")
+
+        job = FileOpJob(action, paths, destination, overwrite)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._expire()
+        self._runner.submit(self._run, job)
+        return job
+
+    def _expire(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise FileOpError(f"Unknown job: {job_id}", 404)
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        job.cancel()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    # Execution
+
+    def _run(self, job):
+        job.started = time.time()
+        job.status = 'running'
+        plans = []
+        for path in job.paths:
+            try:
+                dirs, files, unreadable = _tree(path)
+            except OSError as e:
+                plans.append((path, None, None, None, str(e)))
+                continue
+            plans.append((path, dirs, files, unreadable, None))
+            job.files_total += len(files)
+            job.bytes_total += sum(size for _, size in files)
+
+        results = []
+        for path, dirs, files, unreadable, error in plans:
+            if error is not None:
+                results.append({'path': path, 'ok': False, 'error': error, 'files': 0, 'bytes': 0})
+            elif job.cancelled:
+                results.append({'path': path, 'ok': False, 'error': 'cancelled', 'files': 0, 'bytes': 0})
+            else:
+                results.append(self._apply(job, path, dirs, files, unreadable))
+
+        job.results = results
+        job.status = 'cancelled' if job.cancelled else 'done' if all(r['ok'] for r in results) else 'failed'
+        job.finished = time.time()
+        if self.on_done is not None:
+            try:
+                self.on_done(job)
+            except Exception as e:
+                print(f"Error in file operation callback: {e}")
+
+    def _apply(self, job, path, dirs, files, unreadable):
+        result = {'path': path, 'ok': True, 'files': 0, 'bytes': 0}
+        errors = []
+        counted = threading.Lock()
+
+        def done(size):
+            job.progress(1, size)
+            with counted:
+                result['files'] += 1
+                result['bytes'] += size
+
+        def failed(target, e):
+            with counted:
+                if len(errors) < MAX_ERRORS_PER_PATH:
+                    errors.append({'path': target, 'error': str(e)})
+                result['ok'] = False
+
+        if job.action == DELETE:
+            for e in unreadable:
+                failed(e.filename, e)
+            self._delete(job, dirs, files, done, failed)
+        else:
+            target = os.path.join(job.destination, os.path.basename(path.rstrip(os.sep)))
+            result['destination'] = target
+            if os.path.lexists(target):
+                if os.path.realpath(target) == os.path.realpath(path):
+                    return dict(result, ok=False, error='Source and destination are the same')
+                if not job.overwrite:
+                    return dict(result, ok=False, error='Destination exists')
+                # Replace, never merge: the old target is set aside and only removed once the transfer worked
+                aside = os.path.join(job.destination, f".{os.path.basename(target)}.{job.id}.replaced")
+                try:
+                    os.rename(target, aside)
+                except OSError as e:
+                    return dict(result, ok=False, error=str(e))
+                complete, error = self._transfer(job, path, target, dirs, files, unreadable, done, failed)
+                if complete:
+                    _remove(aside)
+                    result['replaced'] = True
+                else:
+                    _remove(target)
+                    try:
+                        os.rename(aside, target)
+                    except OSError as e:
+                        failed(aside, e)
+            else:
+                complete, error = self._transfer(job, path, target, dirs, files, unreadable, done, failed)
+                if not complete:
+                    # Never leave half a tree behind under the target name
+                    _remove(target)
+            if error is not None:
+                return dict(result, ok=False, error=error)
+
+        if job.cancelled and result['files'] < len(files):
+            result['ok'] = False
+            result['error'] = 'cancelled'
+        if errors:
+            result['errors'] = errors
+        return result
+
+    def _transfer(self, job, path, target, dirs, files, unreadable, done, failed):
+        """Copies or moves `path` to a `target` that does not exist.
+
+        Returns (complete, error): whether everything arrived at `target`, and
+        the error that stopped the transfer before it started, if any. A
+        rename moves unreadable subdirectories along with the rest; a copy
+        cannot, so it is incomplete when there are any.
+        """
+        if job.action == COPY:
+            return self._copy_tree(job, path, target, dirs, files, unreadable, done, failed), None
+        try:
+            os.rename(path, target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                return False, str(e)
+        else:
+            for _, size in files:
+                done(size)
+            return True, None
+        # Different filesystem: copy everything, then remove the source if that worked
+        complete = self._copy_tree(job, path, target, dirs, files, unreadable, done, failed)
+        if complete:
+            self._delete(job, dirs, files, lambda size: None, failed)
+        return complete, None
+
+    def _copy_tree(self, job, source, target, dirs, files, unreadable, done, failed):
+        for e in unreadable:
+            failed(e.filename, e)
+        return self._copy(job, source, target, dirs, files, done, failed) and not unreadable
+
+    def _copy(self, job, source, target, dirs, files, done, failed):
+        """Copies the tree to `target`; returns whether every directory and file was copied."""
+        def dest(path):
+            return target if path == source else os.path.join(target, os.path.relpath(path, source))
+
+        complete = True
+        for directory in dirs:
+            try:
+                os.makedirs(dest(directory), exist_ok=True)
+            except OSError as e:
+                complete = False
+                failed(directory, e)
+
+        def copy(item):
+            path, size = item
+            if job.cancelled:
+                return False
+            try:
+                # copy2 uses sendfile/copy_file_range on Linux; symlinks are copied as links
+                shutil.copy2(path, dest(path), follow_symlinks=False)
+                done(size)
+                return True
+            except OSError as e:
+                failed(path, e)
+                return False
+
+        complete = all(list(self._io.map(copy, files))) and complete
+        for directory in reversed(dirs):
+            try:
+                shutil.copystat(directory, dest(directory))
+            except OSError:
+                pass
+        return complete
+
+    def _delete(self, job, dirs, files, done, failed):
+        def unlink(item):
+            path, size = item
+            if job.cancelled:
+                return
+            try:
+                os.unlink(path)
+                done(size)
+            except OSError as e:
+                failed(path, e)
+
+        list(self._io.map(unlink, files))
+        if job.cancelled:
+            return
+        for directory in reversed(dirs):
+            try:
+                os.rmdir(directory)
+            except OSError as e:
+                failed(directory, e)
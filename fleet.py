@@ -0,0 +1,213 @@
+"""Fleet load generator: many simulated agents in one process.
+
+Each simulated agent has its own Socket.IO connection and the same
+components as a real agent: a BatchEmitter, a JobExecutor running real
+commands, a ServiceStatusProvider (fed canned `systemctl show` output) and,
+in delta mode, a DeltaEncoder. Telemetry payloads come from
+capabilities.metrics.get_system_info over a shared MetricSampler. Without
+--master an in-process master.Master is started, which also drives command
+and service status round trips. The report is printed as JSON.
+
+    python fleet.py --agents 1000 --duration 60 --command-rate 20
+
+Needs the optional aiohttp package.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+
+import socketio
+
+import telemetry
+from master import Master, percentiles
+from emitter import BatchEmitter
+from jobs import JobExecutor
+from sampler import MetricSampler
+from services import ServiceStatusProvider, DEFAULT_UNITS
+from async_runtime import LoopSocket
+from capabilities import metrics
+
+
+def fake_show(units):
+    """Canned `systemctl show` output: every unit loaded, enabled and running."""
+    return '\n\n'.join(
+        f"Id={unit}.service\nLoadState=loaded\nActiveState=active\nSubState=running\nUnitFileState=enabled"
+        for unit in units
+    ) + '\n'
+
+
+class TelemetrySource:
+    """Builds the system_info payload once per sample and shares it across agents."""
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self._seq = None
+        self._info = None
+
+    def snapshot(self):
+        return self.sampler.latest()
+
+    def system_info(self):
+        if self._seq != self.sampler.seq:
+            self._seq = self.sampler.seq
+            self._info = metrics.get_system_info(self.sampler.latest())
+        return self._info
+
+
+class SimAgent:
+    """One simulated agent; its handlers mirror the capability modules."""
+
+    def __init__(self, name, loop, source, args):
+        self.name = name
+        self.source = source
+        self.delta = args.telemetry_mode == 'delta'
+        self.client = socketio.AsyncClient(handle_sigint=False, reconnection=False)
+        self.emitter = BatchEmitter(LoopSocket(self.client, loop), args.batch_size, args.batch_age)
+        self.jobs = JobExecutor(self.emitter.emit, max_workers=1, max_jobs=4)
+        self.services = ServiceStatusProvider(DEFAULT_UNITS, show=fake_show)
+        self.encoder = telemetry.DeltaEncoder()
+
+        self.client.on('connect', self.on_connect)
+        self.client.on('command', self.command)
+        self.client.on('get_service_status', self.get_service_status)
+        self.client.on('handle_get_system_info', self.handle_get_system_info)
+
+    def on_connect(self):
+        self.emitter.emit('agent_details', {'public_ip': '127.0.0.1', 'agent_name': self.name})
+        if self.delta:
+            self.encoder.reset()
+            self.emitter.emit('system_inventory', {'inventory': telemetry.collect_inventory(),
+                                                   'schema': telemetry.schema(), 'agent_name': self.name})
+
+    def command(self, data):
+        try:
+            job = self.jobs.submit(data.get('command'), data.get('timeout'), data.get('job_id'), data)
+        except RuntimeError as e:
+            self.emitter.emit('command_result', {'error': str(e), 'data': data})
+            return None
+        return {'job_id': job.id}
+
+    def get_service_status(self, units=None):
+        self.emitter.emit('get_service_status_result', self.services.get(units), raw=True)
+
+    def handle_get_system_info(self):
+        self.emitter.emit('system_info_response', self.source.system_info())
+
+    async def push_telemetry(self, interval):
+        # Spread the fleet over the interval instead of ticking in lockstep
+        await asyncio.sleep(random.uniform(0, interval))
+        while True:
+            if self.delta:
+                self.emitter.emit('system_info', self.encoder.encode(self.source.snapshot(), time.time()), raw=True)
+            else:
+                self.emitter.emit('system_info', dict(self.source.system_info(), Timestamp=time.time()))
+            await asyncio.sleep(interval)
+
+
+def _raise_fd_limit():
+    # Two sockets per agent when the master is in-process
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def _drive(master, rate, send):
+    """Sends `rate` requests per second to random connected agents."""
+    while True:
+        await asyncio.sleep(1 / rate)
+        sids = list(master.agents)
+        if sids:
+            await send(random.choice(sids))
+
+
+async def run(args):
+    _raise_fd_limit()
+    loop = asyncio.get_running_loop()
+
+    master, runner, url = None, None, args.master
+    if url is None:
+        master = Master()
+        runner = await master.serve('127.0.0.1', args.port)
+        url = f'http://127.0.0.1:{args.port}'
+
+    sampler = MetricSampler(args.interval)
+    sampler.start()
+    source = TelemetrySource(sampler)
+    agents = [SimAgent(f'{args.prefix}-{i}', loop, source, args) for i in range(args.agents)]
+    for agent in agents:
+        agent.emitter.start()
+
+    connect_times = []
+    semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(agent):
+        async with semaphore:
+            started = time.monotonic()
+            await agent.client.connect(url, transports=['websocket'])
+            connect_times.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(connect(agent) for agent in agents), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    connect_duration = time.monotonic() - started
+
+    tasks = [asyncio.create_task(agent.push_telemetry(args.interval)) for agent in agents if agent.client.connected]
+    if master is not None:
+        master.reset_stats()
+        if args.command_rate:
+            tasks.append(asyncio.create_task(_drive(master, args.command_rate, lambda sid: master.send_command(sid, args.command))))
+        if args.service_rate:
+            tasks.append(asyncio.create_task(_drive(master, args.service_rate, lambda sid: master.request(sid, 'get_service_status'))))
+
+    await asyncio.sleep(args.duration)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    report = {
+        'agents': args.agents,
+        'connected': len(agents) - len(failures),
+        'connect_failures': len(failures),
+        'connect_seconds': round(connect_duration, 2),
+        'connect_ms': percentiles(connect_times),
+        'events_sent': sum(a.emitter.events_immediate + a.emitter.events_batched for a in agents),
+    }
+    if failures:
+        report['first_failure'] = str(failures[0])
+    if master is not None:
+        report['master'] = master.stats()
+
+    for agent in agents:
+        agent.emitter.stop()
+        agent.jobs.shutdown()
+    await asyncio.gather(*(agent.client.disconnect() for agent in agents), return_exceptions=True)
+    sampler.stop()
+    if runner is not None:
+        await runner.cleanup()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate a fleet of SixEyes agents')
+    parser.add_argument('--agents', type=int, default=100, help='Simulated agents')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run after all agents connected')
+    parser.add_argument('--master', type=str, default=None, help='URL of an external master (default: start one in-process)')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the in-process master')
+    parser.add_argument('--prefix', type=str, default='sim', help='Agent name prefix')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between telemetry ticks per agent')
+    parser.add_argument('--telemetry-mode', choices=['json', 'delta'], default='json')
+    parser.add_argument('--batch-size', type=int, default=1, help='Events per outbound batch (1 disables batching)')
+    parser.add_argument('--batch-age', type=float, default=0.25)
+    parser.add_argument('--command-rate', type=float, default=5, help='Commands per second across the fleet (in-process master only)')
+    parser.add_argument('--command', type=str, default='true', help='Shell command sent for round trips')
+    parser.add_argument('--service-rate', type=float, default=5, help='get_service_status requests per second across the fleet')
+    parser.add_argument('--connect-concurrency', type=int, default=50, help='Connections opened at the same time')
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
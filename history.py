@@ -0,0 +1,151 @@
+import math
+import threading
+from array import array
+
+import psutil
+
+# Rollup tiers in seconds; every raw sample is folded into each of them.
+DEFAULT_RESOLUTIONS = (1, 10, 60)
+DEFAULT_BUDGET_BYTES = 1024 * 1024
+
+
+def default_series():
+    """Snapshot keys kept in history: total and per-core CPU, memory and swap."""
+    series = ['TotalCPUUsage']
+    series += [f"Core_{i}" for i in range(psutil.cpu_count(logical=True) or 1)]
+    series += ['Memory.Percentage', 'Memory.Used', 'Swap.Percentage', 'Swap.Used']
+    return series
+
+
+class _Tier:
+    """Fixed-capacity ring of (bucket, min, max, avg) rows for one resolution.
+
+    Each series stores its min/max/avg in flat arrays indexed by
+    slot * n_series + series, so the whole tier is a handful of contiguous
+    buffers allocated up front.
+    """
+
+    def __init__(self, resolution, capacity, n_series):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.n_series = n_series
+        self.buckets = array('q', [-1]) * capacity
+        self.mins = array('d', [0.0]) * (capacity * n_series)
+        self.maxs = array('d', [0.0]) * (capacity * n_series)
+        self.avgs = array('d', [0.0]) * (capacity * n_series)
+        self.head = 0  # next slot to write
+        self.size = 0
+
+        # Bucket still being accumulated, committed once a later bucket starts
+        self.open_bucket = None
+        self.open_min = [0.0] * n_series
+        self.open_max = [0.0] * n_series
+        self.open_sum = [0.0] * n_series
+        self.open_count = 0
+
+    @staticmethod
+    def slot_bytes(n_series):
+        return array('q').itemsize + 3 * n_series * array('d').itemsize
+
+    def add(self, timestamp, values):
+        bucket = int(timestamp // self.resolution)
+        if self.open_bucket is not None and bucket != self.open_bucket:
+            self._commit()
+        if self.open_bucket is None or bucket != self.open_bucket:
+            self.open_bucket = bucket
+            self.open_min[:] = values
+            self.open_max[:] = values
+            self.open_sum[:] = values
+            self.open_count = 1
+            return
+        for i, value in enumerate(values):
+            if value < self.open_min[i]:
+                self.open_min[i] = value
+            if value > self.open_max[i]:
+                self.open_max[i] = value
+            self.open_sum[i] += value
+        self.open_count += 1
+
+    def _commit(self):
+        slot = self.head
+        base = slot * self.n_series
+        self.buckets[slot] = self.open_bucket
+        for i in range(self.n_series):
+            self.mins[base + i] = self.open_min[i]
+            self.maxs[base + i] = self.open_max[i]
+            self.avgs[base + i] = self.open_sum[i] / self.open_count
+        self.head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.open_bucket = None
+
+    def rows(self, start_bucket, end_bucket):
+        """Yields (bucket, mins, maxs, avgs) oldest first, including the open bucket."""
+        first = (self.head - self.size) % self.capacity
+        for n in range(self.size):
+            slot = (first + n) % self.capacity
+            bucket = self.buckets[slot]
+            if start_bucket <= bucket <= end_bucket:
+                base = slot * self.n_series
+                end = base + self.n_series
+                yield bucket, self.mins[base:end], self.maxs[base:end], self.avgs[base:end]
+        if self.open_bucket is not None and start_bucket <= self.open_bucket <= end_bucket:
+            avgs = [total / self.open_count for total in self.open_sum]
+            yield self.open_bucket, self.open_min, self.open_max, avgs
+
+
+class MetricsHistory:
+    """Multi-resolution history of sampler snapshots under a fixed memory budget.
+
+    The budget is split evenly between the tiers, so with the defaults the 1s
+    tier covers the last few minutes and the 60s tier the last several hours.
+    """
+
+    def __init__(self, series=None, budget_bytes=DEFAULT_BUDGET_BYTES, resolutions=DEFAULT_RESOLUTIONS):
+        self.series = list(series) if series is not None else default_series()
+        self._index = {name: i for i, name in enumerate(self.series)}
+        per_tier = budget_bytes // len(resolutions)
+        capacity = max(per_tier // _Tier.slot_bytes(len(self.series)), 1)
+        self.tiers = {res: _Tier(res, capacity, len(self.series)) for res in resolutions}
+        self._lock = threading.Lock()
+
+    @property
+    def resolutions(self):
+        return sorted(self.tiers)
+
+    def record(self, snapshot):
+        """Folds one sampler snapshot into every tier; suitable as a sampler listener."""
+        values = [float(snapshot.get(name, math.nan)) for name in self.series]
+        timestamp = snapshot['Timestamp']
+        with self._lock:
+            for tier in self.tiers.values():
+                tier.add(timestamp, values)
+
+    def query(self, start, end, resolution, series=None):
+        """Returns the rows between `start` and `end` (epoch seconds) in columnar form."""
+        if resolution not in self.tiers:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        names = list(series) if series else self.series
+        unknown = [name for name in names if name not in self._index]
+        if unknown:
+            raise ValueError(f"Unknown series: {', '.join(unknown)}")
+        columns = [self._index[name] for name in names]
+
+        tier = self.tiers[resolution]
+        result = {
+            'resolution': resolution,
+            'timestamps': [],
+            'series': {name: {'min': [], 'max': [], 'avg': []} for name in names},
+        }
+        with self._lock:
+            for bucket, mins, maxs, avgs in tier.rows(int(start // resolution), int(end // resolution)):
+                result['timestamps'].append(bucket * resolution)
+                for name, column in zip(names, columns):
+                    out = result['series'][name]
+                    out['min'].append(_json_number(mins[column]))
+                    out['max'].append(_json_number(maxs[column]))
+                    out['avg'].append(_json_number(round(avgs[column], 2)))
+        return result
+
+
+def _json_number(value):
+    return None if math.isnan(value) else value
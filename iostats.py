@@ -0,0 +1,148 @@
+import time
+import threading
+
+import psutil
+
+# Pseudo block devices that only add noise to the per-disk view
+IGNORED_DISKS = ('loop', 'ram')
+
+DISK_FIELDS = [
+    ('read_bytes', 'ReadRate'),
+    ('write_bytes', 'WriteRate'),
+    ('read_count', 'ReadOps'),
+    ('write_count', 'WriteOps'),
+]
+
+NET_FIELDS = [
+    ('bytes_sent', 'SentRate'),
+    ('bytes_recv', 'RecvRate'),
+    ('packets_sent', 'PacketsSent'),
+    ('packets_recv', 'PacketsRecv'),
+    ('errin', 'ErrorsIn'),
+    ('errout', 'ErrorsOut'),
+]
+
+# Host-wide totals, kept in the metrics history
+TOTAL_SERIES = ['Disk.ReadRate', 'Disk.WriteRate', 'Net.SentRate', 'Net.RecvRate']
+
+DEFAULT_MOUNT_INTERVAL = 60
+
+def counter_delta(before, after):
+    """Increase of a cumulative counter, treating any decrease as a reset.
+
+    psutil's nowrap mode folds kernel counter wraps into the totals, so a
+    decrease means the device or interface was reset or re-added and counts
+    from zero again; what it has counted since is the best estimate.
+    """
+    if after >= before:
+        return after - before
+    return after
+
+
+class IORates:
+    """Per-disk and per-interface rates from the counters of consecutive samples.
+
+    Add `update` as a sampler collector; it writes 'Disk.<name>.<Field>' and
+    'Net.<name>.<Field>' keys (per second) plus the host totals in
+    TOTAL_SERIES. The first sample only sets the baseline.
+    """
+
+    def __init__(self):
+        self._previous = None
+
+    def _read(self):
+        disks = psutil.disk_io_counters(perdisk=True, nowrap=True) or {}
+        disks = {name: c for name, c in disks.items() if not name.startswith(IGNORED_DISKS)}
+        nics = psutil.net_io_counters(pernic=True, nowrap=True) or {}
+        return time.monotonic(), disks, nics
+
+    @staticmethod
+    def _rates(metrics, prefix, before, after, fields, elapsed):
+        for name, counters in after.items():
+            previous = before.get(name)
+            if previous is None:
+                continue
+            for attr, label in fields:
+                delta = counter_delta(getattr(previous, attr), getattr(counters, attr))
+                metrics[f"{prefix}.{name}.{label}"] = round(delta / elapsed, 1)
+
+    def update(self, metrics):
+        current = self._read()
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return
+        elapsed = current[0] - previous[0]
+        if elapsed <= 0:
+            return
+
+        self._rates(metrics, 'Disk', previous[1], current[1], DISK_FIELDS, elapsed)
+        self._rates(metrics, 'Net', previous[2], current[2], NET_FIELDS, elapsed)
+        for prefix, names, labels in (('Disk', current[1], ('ReadRate', 'WriteRate')),
+                                      ('Net', current[2], ('SentRate', 'RecvRate'))):
+            for label in labels:
+                metrics[f"{prefix}.{label}"] = sum(metrics.get(f"{prefix}.{name}.{label}", 0.0) for name in names)
+
+
+class MountUsage:
+    """Filesystem usage per mountpoint, refreshed on its own slow interval.
+
+    statvfs on a network mount can hang for minutes, so each mount is queried
+    on a short-lived thread; a mount whose previous query has not returned is
+    skipped rather than stacking up threads. `update` only copies the cached
+    values, so the fast sampler tick never waits on a filesystem.
+    """
+
+    def __init__(self, interval=DEFAULT_MOUNT_INTERVAL):
+        self.interval = interval
+        self._usage = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name='mount-usage', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing mount usage: {e}")
+
+    def refresh(self):
+        """Starts a usage query for every mounted filesystem that is not still busy."""
+        mounts = {part.mountpoint for part in psutil.disk_partitions(all=False)}
+        with self._lock:
+            for gone in set(self._usage) - mounts:
+                del self._usage[gone]
+            mounts -= self._pending
+            self._pending |= mounts
+        for mountpoint in mounts:
+            threading.Thread(target=self._query, args=(mountpoint,), name='mount-usage-query', daemon=True).start()
+
+    def _query(self, mountpoint):
+        try:
+            usage = psutil.disk_usage(mountpoint)
+        except OSError:
+            usage = None
+        with self._lock:
+            self._pending.discard(mountpoint)
+            if usage is not None:
+                self._usage[mountpoint] = usage
+
+    def update(self, metrics):
+        with self._lock:
+            usage = list(self._usage.items())
+        for mountpoint, u in usage:
+            metrics[f"Mount.{mountpoint}.Total"] = u.total
+            metrics[f"Mount.{mountpoint}.Used"] = u.used
+            metrics[f"Mount.{mountpoint}.Free"] = u.free
+            metrics[f"Mount.{mountpoint}.Percentage"] = u.percent
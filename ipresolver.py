@@ -0,0 +1,113 @@
+import time
+import threading
+
+DEFAULT_URL = 'https://ipinfo.io/ip'
+
+
+def url_source(url=DEFAULT_URL, timeout=5):
+    """Looks the address up over HTTP, e.g. ipinfo.io or a local stand-in service."""
+    def lookup():
+        import requests
+
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.text.strip() or None
+    return lookup
+
+
+def netifaces_source(interface=None):
+    """Uses the first IPv4 address of `interface`, or of the default-route interface."""
+    def lookup():
+        import netifaces
+
+        name = interface
+        if name is None:
+            default = netifaces.gateways().get('default', {}).get(netifaces.AF_INET)
+            if not default:
+                return None
+            name = default[1]
+        addresses = netifaces.ifaddresses(name).get(netifaces.AF_INET, [])
+        return addresses[0]['addr'] if addresses else None
+    return lookup
+
+
+def static_source(address):
+    """Always reports the configured address."""
+    def lookup():
+        return address
+    return lookup
+
+
+def make_source(spec):
+    """Builds a lookup from a command-line spec: 'url[:URL]', 'netifaces[:IFACE]' or 'static:ADDR'."""
+    kind, _, value = spec.partition(':')
+    if kind == 'url':
+        return url_source(value or DEFAULT_URL)
+    if kind == 'netifaces':
+        return netifaces_source(value or None)
+    if kind == 'static':
+        if not value:
+            raise ValueError("static source needs an address, e.g. static:203.0.113.7")
+        return static_source(value)
+    raise ValueError(f"Unknown address source: {spec}")
+
+
+class PublicAddressResolver:
+    """Caches the agent's public address and refreshes it on a background thread.
+
+    `get()` only ever returns the cached value (None until the first lookup
+    succeeds), so nothing on the telemetry or connect path waits on the
+    network. Listeners registered with `add_listener` are called with the new
+    address whenever a refresh finds that it changed.
+    """
+
+    def __init__(self, source=None, ttl=300, retry=30):
+        self.source = source or url_source()
+        self.ttl = ttl
+        self.retry = retry
+        self.address = None
+        self.resolved_at = None
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Registers `callback(address)` to run when the address changes."""
+        self._listeners.append(callback)
+
+    def get(self):
+        return self.address
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='address-resolver', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self):
+        """Runs one lookup now; returns True if it succeeded."""
+        try:
+            address = self.source()
+        except Exception as e:
+            print(f"Error getting public IP: {e}")
+            return False
+        if not address:
+            return False
+
+        previous = self.address
+        self.address = address
+        self.resolved_at = time.time()
+        if address != previous:
+            for callback in self._listeners:
+                try:
+                    callback(address)
+                except Exception as e:
+                    print(f"Error in address listener: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.ttl if self.refresh() else self.retry
+            self._stop.wait(delay)
@@ -0,0 +1,256 @@
+import os
+import time
+import uuid
+import signal
+import selectors
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_JOBS = 16
+BATCH_LINES = 100
+BATCH_INTERVAL = 0.2
+KILL_GRACE = 5
+MAX_LINE = 64 * 1024
+# Output kept for the legacy 'result' field of command_result
+RESULT_CAP = 1024 * 1024
+
+
+class Job:
+    def __init__(self, job_id, command, timeout, data):
+        self.id = job_id
+        self.command = command
+        self.timeout = timeout
+        self.data = data
+        self.status = 'queued'
+        self.process = None
+        self.started = None
+        self.finished = None
+        self.returncode = None
+        self.cancel_requested = False
+        self.output = bytearray()
+        self.truncated = False
+
+    def info(self):
+        return {
+            'job_id': self.id,
+            'command': self.command,
+            'status': self.status,
+            'returncode': self.returncode,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobExecutor:
+    """Runs shell commands on a bounded worker pool and streams their output.
+
+    Every command gets a job id. stdout and stderr are read as the process
+    runs and sent as `command_output` events in batches of lines (flushed by
+    count or age), and `command_result` reports the final status. Jobs can be
+    cancelled or time out, which kills the whole process group. At most
+    `max_jobs` commands may be running or queued at once.
+    """
+
+    def __init__(self, emit, max_workers=DEFAULT_WORKERS, max_jobs=DEFAULT_MAX_JOBS, default_timeout=None):
+        self.emit = emit
+        self.max_jobs = max_jobs
+        self.default_timeout = default_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def active(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if job.status in ('queued', 'running')]
+
+    def submit(self, command, timeout=None, job_id=None, data=None):
+        """Queues `command` and returns its Job.
+
+        Raises ValueError for a missing command, a bad timeout or a job id that
+        is already active, and RuntimeError when at the concurrency limit.
+        """
+        if not isinstance(command, str) or not command.strip():
+            raise ValueError(f"Invalid command: {command!r}")
+        if timeout is not None:
+            try:
+                timeout = float(timeout)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid timeout: {timeout!r}")
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status in ('queued', 'running'))
+            if active >= self.max_jobs:
+                raise RuntimeError(f"Too many commands running ({active}/{self.max_jobs})")
+            if job_id is not None and job_id in self._jobs and self._jobs[job_id].status in ('queued', 'running'):
+                raise ValueError(f"Job {job_id} is already running")
+            # Forget finished jobs so the table does not grow forever
+            for finished in [j.id for j in self._jobs.values() if j.status not in ('queued', 'running')]:
+                del self._jobs[finished]
+            job = Job(job_id or uuid.uuid4().hex, command, timeout or self.default_timeout, data)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job; returns False if it is unknown or already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.status not in ('queued', 'running'):
+            return False
+        job.cancel_requested = True
+        if job.process is not None:
+            self._terminate(job)
+        return True
+
+    def _terminate(self, job):
+        try:
+            os.killpg(job.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        timer = threading.Timer(KILL_GRACE, self._kill, args=(job,))
+        timer.daemon = True
+        timer.start()
+
+    def _kill(self, job):
+        if job.process.poll() is None:
+            try:
+                os.killpg(job.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def _run(self, job):
+        # Whatever goes wrong, the job must finish: its max_jobs slot is only freed then
+        try:
+            self._execute(job)
+        except Exception as e:
+            if job.process is not None and job.process.poll() is None:
+                self._terminate(job)
+            if job.finished is None:
+                self._finish(job, 'failed', str(e))
+
+    def _execute(self, job):
+        if job.cancel_requested:
+            self._finish(job, 'cancelled')
+            return
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            job.process = subprocess.Popen(job.command, shell=True, stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           start_new_session=True)
+        except OSError as e:
+            self._finish(job, 'failed', str(e))
+            return
+        # A cancel that arrived before the process existed could not kill it
+        if job.cancel_requested:
+            self._terminate(job)
+        self.emit('command_started', {'job_id': job.id, 'data': job.data})
+
+        try:
+            timed_out = self._pump(job)
+        except Exception as e:
+            self._terminate(job)
+            job.process.wait()
+            self._finish(job, 'failed', str(e))
+            return
+
+        job.returncode = job.process.wait()
+        if timed_out:
+            self._finish(job, 'timeout')
+        elif job.cancel_requested:
+            self._finish(job, 'cancelled')
+        else:
+            self._finish(job, 'completed' if job.returncode == 0 else 'failed')
+
+    def _pump(self, job):
+        """Reads both pipes until EOF, emitting line batches; returns True if the job timed out."""
+        deadline = job.started + job.timeout if job.timeout else None
+        timed_out = False
+        partial = {'stdout': b'', 'stderr': b''}
+        pending = {'stdout': [], 'stderr': []}
+        last_flush = time.monotonic()
+
+        sel = selectors.DefaultSelector()
+        sel.register(job.process.stdout, selectors.EVENT_READ, 'stdout')
+        sel.register(job.process.stderr, selectors.EVENT_READ, 'stderr')
+        try:
+            while sel.get_map():
+                wait = BATCH_INTERVAL
+                if deadline is not None and not timed_out:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        timed_out = True
+                        self._terminate(job)
+                    else:
+                        wait = min(wait, remaining)
+
+                for key, _ in sel.select(wait):
+                    stream = key.data
+                    chunk = os.read(key.fileobj.fileno(), 65536)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        if partial[stream]:
+                            pending[stream].append(partial[stream])
+                            partial[stream] = b''
+                        continue
+                    if stream == 'stdout':
+                        self._keep_output(job, chunk)
+                    lines = (partial[stream] + chunk).split(b'\n')
+                    partial[stream] = lines.pop()
+                    # Emit very long unterminated lines in pieces rather than buffering them
+                    if len(partial[stream]) >= MAX_LINE:
+                        lines.append(partial[stream])
+                        partial[stream] = b''
+                    pending[stream].extend(lines)
+
+                if (time.monotonic() - last_flush >= BATCH_INTERVAL
+                        or any(len(lines) >= BATCH_LINES for lines in pending.values())):
+                    self._flush(job, pending)
+                    last_flush = time.monotonic()
+            self._flush(job, pending)
+        finally:
+            sel.close()
+            job.process.stdout.close()
+            job.process.stderr.close()
+        return timed_out
+
+    def _keep_output(self, job, chunk):
+        room = RESULT_CAP - len(job.output)
+        if room > 0:
+            job.output += chunk[:room]
+        if len(chunk) > room:
+            job.truncated = True
+
+    def _flush(self, job, pending):
+        for stream, lines in pending.items():
+            if lines:
+                self.emit('command_output', {
+                    'job_id': job.id,
+                    'stream': stream,
+                    'lines': [line.decode('utf-8', errors='replace') for line in lines],
+                })
+                lines.clear()
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.finished = time.time()
+        result = {
+            'job_id': job.id,
+            'status': status,
+            'returncode': job.returncode,
+            'duration': job.finished - job.started if job.started else 0.0,
+            'data': job.data,
+        }
+        if job.started:
+            result['result'] = job.output.decode('utf-8', errors='replace')
+            result['truncated'] = job.truncated
+        if status != 'completed':
+            result['error'] = error or f"Command {status}" + (f" (exit code {job.returncode})" if status == 'failed' else '')
+        job.output = bytearray()
+        self.emit('command_result', result)
+
+    def shutdown(self):
+        for job in self.active():
+            self.cancel(job.id)
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,131 @@
+import os
+import json
+import base64
+import fnmatch
+
+# Listings with more entries than this are streamed instead of built in memory
+STREAM_THRESHOLD = 10000
+
+SORT_KEYS = {
+    'name': lambda e: e['name'],
+    'size': lambda e: e['size'],
+    'mtime': lambda e: e['mtime'],
+    'type': lambda e: 0 if e['type'] == 'directory' else 1,
+}
+
+
+def entry_info(entry):
+    """Builds the listing record for a DirEntry, or None for anything but files and directories."""
+    try:
+        st = entry.stat()
+        is_dir = entry.is_dir()
+        if not is_dir and not entry.is_file():
+            return None
+    except OSError:
+        # Broken symlinks and entries removed while scanning
+        return None
+    return {
+        'name': entry.name + '/' if is_dir else entry.name,
+        'type': 'directory' if is_dir else 'file',
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+        'mode': st.st_mode,
+    }
+
+
+def name_matcher(pattern):
+    """Glob match if the pattern has wildcards, case-insensitive substring match otherwise."""
+    if not pattern:
+        return None
+    pattern = pattern.lower()
+    if any(c in pattern for c in '*?['):
+        return lambda name: fnmatch.fnmatchcase(name.lower(), pattern)
+    return lambda name: pattern in name.lower()
+
+
+def iter_entries(directory, pattern=None):
+    """Yields listing records straight from os.scandir without materialising the directory."""
+    match = name_matcher(pattern)
+    with os.scandir(directory) as it:
+        for entry in it:
+            if match is not None and not match(entry.name):
+                continue
+            info = entry_info(entry)
+            if info is not None:
+                yield info
+
+
+def sort_key(sort):
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    key = SORT_KEYS[sort]
+    return lambda e: (key(e), e['name'])
+
+
+def list_files(directory, pattern=None, sort='name', reverse=False):
+    """Lists a directory with size, mtime and mode for each entry, sorted server-side."""
+    files = list(iter_entries(directory, pattern))
+    files.sort(key=sort_key(sort), reverse=reverse)
+    return files
+
+
+def select(files, pattern=None, sort='name', reverse=False):
+    """Filters and sorts an already scanned listing (e.g. one from the directory cache)."""
+    key = sort_key(sort)
+    match = name_matcher(pattern)
+    if match is not None:
+        files = [e for e in files if match(e['name'].rstrip('/'))]
+    return sorted(files, key=key, reverse=reverse)
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        key = tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if len(key) != 2:
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def paginate(files, sort='name', reverse=False, cursor=None, limit=None):
+    """Returns (page, next_cursor) from a sorted listing.
+
+    The cursor is the sort key of the last entry returned rather than an
+    offset, so entries created or removed between pages do not shift the
+    window.
+    """
+    key = sort_key(sort)
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            if reverse:
+                files = [e for e in files if key(e) < after]
+            else:
+                files = [e for e in files if key(e) > after]
+        except TypeError:
+            # Well-formed cursor from another sort order (or forged), e.g. a name where a size belongs
+            raise ValueError("Invalid cursor")
+    if limit is None or len(files) <= limit:
+        return files, None
+    page = files[:limit]
+    return page, encode_cursor(key(page[-1]))
+
+
+def iter_json(fields, files):
+    """Streams {"files": [...], **fields} as JSON chunks, one entry at a time."""
+    yield '{"files": ['
+    first = True
+    for info in files:
+        if not first:
+            yield ', '
+        yield json.dumps(info)
+        first = False
+    yield ']'
+    for name, value in fields.items():
+        yield f', {json.dumps(name)}: {json.dumps(value)}'
+    yield '}'
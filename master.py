@@ -0,0 +1,174 @@
+"""Local stand-in for the SixEyes master, for development and scale tests.
+
+Accepts agent connections on the master's Socket.IO port, unpacks batched
+events and delta telemetry, and keeps ingest counters plus latency samples
+for telemetry and request/response round trips. Run it on its own to watch
+real agents, or let fleet.py start one in-process.
+Needs the optional aiohttp package.
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from collections import Counter, defaultdict, deque
+
+import socketio
+
+import telemetry
+
+# Latency samples kept per metric; older ones are dropped
+MAX_SAMPLES = 100000
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Nearest-rank percentiles of `values` in milliseconds, plus the max."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 2) for p in points}
+    result['max'] = round(ordered[-1] * 1000, 2)
+    return result
+
+
+def payload_size(data):
+    """Approximate wire size of an event payload (bytes and strings as-is, the rest as JSON)."""
+    if isinstance(data, (str, bytes)):
+        return len(data)
+    if isinstance(data, (list, tuple)):
+        return sum(payload_size(item) for item in data)
+    return len(json.dumps(data))
+
+
+class Master:
+    """Socket.IO server speaking the agent protocol, with ingest statistics."""
+
+    def __init__(self, server=None):
+        self.sio = server or socketio.AsyncServer(async_mode='aiohttp')
+        self.agents = {}
+        self.events = Counter()
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.telemetry_latency = deque(maxlen=MAX_SAMPLES)
+        self.round_trips = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+        self._pending_commands = {}
+        self._pending_requests = defaultdict(deque)
+
+        self.sio.on('connect', self.on_connect)
+        self.sio.on('disconnect', self.on_disconnect)
+        self.sio.on('*', self.on_event)
+
+    async def on_connect(self, sid, environ, auth=None):
+        self.agents[sid] = None
+
+    async def on_disconnect(self, sid, reason=None):
+        self.agents.pop(sid, None)
+        self._pending_requests.pop(sid, None)
+
+    async def on_event(self, event, sid, data=None):
+        self.bytes += payload_size(data)
+        if event == 'batch':
+            for name, item in data:
+                self.ingest(sid, name, item)
+        else:
+            self.ingest(sid, event, data)
+
+    def ingest(self, sid, event, data):
+        received = time.time()
+        self.events[event] += 1
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                pass
+
+        if event == 'agent_details' and isinstance(data, dict):
+            self.agents[sid] = data.get('agent_name')
+        elif event == 'system_info':
+            if isinstance(data, bytes):
+                timestamp = telemetry.decode_delta(data)[0]
+            else:
+                timestamp = data.get('Timestamp') if isinstance(data, dict) else None
+            if timestamp:
+                self.telemetry_latency.append(received - timestamp)
+        elif event == 'command_result' and isinstance(data, dict):
+            sent = self._pending_commands.pop(data.get('job_id'), None)
+            if sent is not None:
+                self.round_trips['command'].append(time.monotonic() - sent)
+        elif event.endswith('_result'):
+            pending = self._pending_requests[sid]
+            request = event[:-len('_result')]
+            for i, (name, sent) in enumerate(pending):
+                if name == request:
+                    del pending[i]
+                    self.round_trips[request].append(time.monotonic() - sent)
+                    break
+
+    async def send_command(self, sid, command):
+        """Sends `command` to one agent; the round trip ends at its command_result."""
+        job_id = uuid.uuid4().hex
+        self._pending_commands[job_id] = time.monotonic()
+        await self.sio.emit('command', {'command': command, 'job_id': job_id}, to=sid)
+        return job_id
+
+    async def request(self, sid, event, data=None):
+        """Sends a request event; the round trip ends at the matching `<event>_result`."""
+        self._pending_requests[sid].append((event, time.monotonic()))
+        await self.sio.emit(event, data, to=sid)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        total = sum(self.events.values())
+        return {
+            'agents': len(self.agents),
+            'elapsed': round(elapsed, 1),
+            'events': total,
+            'events_per_sec': round(total / elapsed, 1) if elapsed else 0.0,
+            'bytes_per_sec': round(self.bytes / elapsed) if elapsed else 0,
+            'by_event': dict(self.events),
+            'telemetry_latency_ms': percentiles(self.telemetry_latency),
+            'round_trip_ms': {name: percentiles(values) for name, values in self.round_trips.items()},
+        }
+
+    def reset_stats(self):
+        self.events.clear()
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.telemetry_latency.clear()
+        self.round_trips.clear()
+
+    async def serve(self, host='0.0.0.0', port=5000):
+        """Starts listening and returns the aiohttp runner (call `cleanup()` on it to stop)."""
+        from aiohttp import web
+
+        app = web.Application()
+        self.sio.attach(app)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+async def run(args):
+    master = Master()
+    await master.serve(args.host, args.port)
+    print(f"Master stand-in listening on {args.host}:{args.port}")
+    while True:
+        await asyncio.sleep(args.report_interval)
+        print(json.dumps(master.stats()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local SixEyes master stand-in')
+    parser.add_argument('--host', type=str, default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--report-interval', type=float, default=10, help='Seconds between printed statistics')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
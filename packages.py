@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import threading
+import subprocess
+from collections import OrderedDict
+
+INSTALL = 'install'
+REMOVE = 'remove'
+
+# Pending requests arriving within this window join the same transaction
+COALESCE_WINDOW = 0.5
+OUTPUT_TAIL = 50
+
+_PROGRESS = re.compile(r'^(Unpacking|Setting up|Removing|Purging) ([^\s:]+)')
+_STAGES = {'Unpacking': 'unpacking', 'Setting up': 'configured', 'Removing': 'removed', 'Purging': 'removed'}
+
+# apt errors that depend on which packages were asked for; only these are worth retrying with fewer
+_UNKNOWN_PACKAGE = re.compile(r"^E: (?:Unable to locate package (\S+)|Package '([^']+)' has no installation candidate)")
+_RESOLUTION_ERROR = re.compile(r"^E: (?:Unable to locate package|Package '.+' has no installation candidate"
+                               r"|Unable to correct problems|Couldn't find any package)")
+
+
+def parse_progress(line):
+    """Maps an apt/dpkg output line to (package, stage), or None."""
+    match = _PROGRESS.match(line)
+    if not match:
+        return None
+    return match.group(2), _STAGES[match.group(1)]
+
+
+class AptBackend:
+    """Runs one apt-get transaction; removals use apt's trailing '-' syntax."""
+
+    def run(self, installs, removes, on_line):
+        command = ['sudo', 'apt-get', 'install', '-y', '--'] + list(installs) + [f"{name}-" for name in removes]
+        env = dict(os.environ, DEBIAN_FRONTEND='noninteractive')
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+        for raw in process.stdout:
+            on_line(raw.decode('utf-8', errors='replace').rstrip('\n'))
+        return process.wait()
+
+
+class FakeBackend:
+    """Stand-in package manager that records transactions instead of running apt."""
+
+    def __init__(self, fail=(), delay=0.0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.transactions = []
+
+    def run(self, installs, removes, on_line):
+        self.transactions.append((list(installs), list(removes)))
+        time.sleep(self.delay)
+        failed = self.fail & (set(installs) | set(removes))
+        if failed:
+            # Like apt, an unknown package aborts the transaction before anything changes
+            for name in sorted(failed):
+                on_line(f"E: Unable to locate package {name}")
+            return 100
+        for name in installs:
+            on_line(f"Unpacking {name} (1.0) ...")
+            on_line(f"Setting up {name} (1.0) ...")
+        for name in removes:
+            on_line(f"Removing {name} (1.0) ...")
+        return 0
+
+
+class PackageQueue:
+    """Serialises package manager access and coalesces requests into transactions.
+
+    Requests are queued per package (a later request for the same package
+    replaces the earlier one). A single worker takes everything pending,
+    waits briefly for more, and runs one transaction for the lot, so ten
+    installs cost one apt resolution and never race for the dpkg lock.
+    When a transaction of several packages fails to resolve, the packages
+    apt names as unknown fail on their own and the rest are retried; if apt
+    names none, the batch is split in half. Other failures (dpkg lock,
+    network, sudo) would fail the same way again, so the whole batch is
+    reported failed. `on_progress(package, stage)` is called as packages
+    move through the transaction and `on_done(package, action, ok, output)`
+    once it finishes; a request replaced by a newer one for the same
+    package gets `on_done(..., superseded=True)` right away.
+    """
+
+    def __init__(self, backend=None, on_progress=None, on_done=None, window=COALESCE_WINDOW):
+        self.backend = backend or AptBackend()
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.window = window
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.transactions = 0
+        self.last_duration = None
+        self.total_duration = 0.0
+        self.last_size = 0
+        self.retries = 0
+        self.running = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='package-queue', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def submit(self, action, package):
+        if action not in (INSTALL, REMOVE):
+            raise ValueError(f"Unknown package action: {action}")
+        with self._cond:
+            previous = self._pending.pop(package, None)
+            self._pending[package] = action
+            self._cond.notify()
+        if previous is not None and self.on_done:
+            self.on_done(package, previous, False, f"Superseded by a later {action} request", superseded=True)
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def _take(self):
+        with self._cond:
+            while not self._pending and not self._stop.is_set():
+                self._cond.wait()
+        # Let requests that arrive right behind the first one join this transaction
+        self._stop.wait(self.window)
+        with self._cond:
+            batch = list(self._pending.items())
+            self._pending.clear()
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take()
+            if not batch:
+                continue
+            try:
+                self._transaction(batch)
+            except Exception as e:
+                # Never let one batch kill the worker, or every later request would hang
+                print(f"Error running package transaction: {e}")
+                self._report(batch, False, str(e))
+
+    def _report(self, batch, ok, text):
+        if self.on_done:
+            for name, action in batch:
+                self.on_done(name, action, ok, text)
+
+    def _transaction(self, batch):
+        returncode, output, errors = self._execute(batch)
+        text = '\n'.join(output)
+        resolution = [line for line in errors if _RESOLUTION_ERROR.match(line)]
+        if returncode == 0 or len(batch) == 1 or not resolution or self._stop.is_set():
+            self._report(batch, returncode == 0, text)
+            return
+
+        self.retries += 1
+        unknown = set()
+        for line in resolution:
+            match = _UNKNOWN_PACKAGE.match(line)
+            if match:
+                unknown.add(match.group(1) or match.group(2))
+        bad = [(name, action) for name, action in batch if name in unknown]
+        if bad:
+            self._report(bad, False, text)
+            rest = [(name, action) for name, action in batch if name not in unknown]
+            if rest:
+                self._transaction(rest)
+        else:
+            middle = len(batch) // 2
+            self._transaction(batch[:middle])
+            self._transaction(batch[middle:])
+
+    def _execute(self, batch):
+        """Runs one backend transaction; returns (returncode, last output lines, apt error lines)."""
+        installs = [name for name, action in batch if action == INSTALL]
+        removes = [name for name, action in batch if action == REMOVE]
+        output = []
+        errors = []
+
+        def on_line(line):
+            if line.startswith('E: '):
+                errors.append(line)
+            output.append(line)
+            if len(output) > OUTPUT_TAIL:
+                del output[0]
+            progress = parse_progress(line)
+            if progress and self.on_progress:
+                self.on_progress(*progress)
+
+        self.running = True
+        started = time.monotonic()
+        try:
+            returncode = self.backend.run(installs, removes, on_line)
+        except OSError as e:
+            output.append(str(e))
+            returncode = None
+        finally:
+            self.running = False
+        duration = time.monotonic() - started
+
+        self.transactions += 1
+        self.last_duration = duration
+        self.total_duration += duration
+        self.last_size = len(batch)
+        return returncode, output, errors
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'running': self.running,
+            'transactions': self.transactions,
+            'last_size': self.last_size,
+            'retries': self.retries,
+            'last_duration': self.last_duration,
+            'avg_duration': self.total_duration / self.transactions if self.transactions else None,
+        }
@@ -0,0 +1,133 @@
+import time
+import heapq
+import threading
+
+import psutil
+
+# Only what the top-N rows need; everything else in /proc is never read
+ATTRS = ['name', 'create_time', 'cpu_times', 'memory_info', 'io_counters']
+
+SORT_KEYS = ('cpu', 'memory', 'io')
+
+DEFAULT_TOP = 10
+DEFAULT_BUDGET = 0.02
+
+
+class ProcessTable:
+    """Top-N process view collected incrementally on a background thread.
+
+    psutil.process_iter keeps its Process objects between calls, so each tick
+    only reads the attributes in ATTRS for every pid. CPU and I/O rates come
+    from the delta against the previous tick, keyed by (pid, create_time) so a
+    reused pid starts from scratch. Only the top `top` rows by `sort` are kept.
+
+    A tick's cost is measured, and the interval is stretched so collection
+    takes at most `budget` of one CPU even with tens of thousands of processes.
+    """
+
+    def __init__(self, top=DEFAULT_TOP, sort='cpu', interval=5.0, budget=DEFAULT_BUDGET):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort} (choose from {', '.join(SORT_KEYS)})")
+        self.top = top
+        self.sort = sort
+        self.interval = interval
+        self.budget = budget
+        self._previous = {}
+        self._last_tick = None
+        self._snapshot = None
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'ticks': 0, 'processes': 0, 'last_duration': 0.0, 'total_duration': 0.0, 'interval': interval}
+
+    def collect(self):
+        """Reads the process table once and returns the snapshot for this tick."""
+        started = time.perf_counter()
+        now = time.monotonic()
+        elapsed = now - self._last_tick if self._last_tick is not None else None
+        total_memory = psutil.virtual_memory().total
+
+        rows = []
+        current = {}
+        for proc in psutil.process_iter(ATTRS, ad_value=None):
+            info = proc.info
+            cpu_times = info['cpu_times']
+            if cpu_times is None:
+                continue
+            cpu_total = cpu_times.user + cpu_times.system
+            io = info['io_counters']
+            io_total = io.read_bytes + io.write_bytes if io is not None else None
+            key = (proc.pid, info['create_time'])
+            current[key] = (cpu_total, io_total)
+
+            cpu = io_rate = 0.0
+            previous = self._previous.get(key)
+            if previous is not None and elapsed:
+                cpu = max(cpu_total - previous[0], 0.0) / elapsed * 100
+                if io_total is not None and previous[1] is not None:
+                    io_rate = max(io_total - previous[1], 0) / elapsed
+            rss = info['memory_info'].rss if info['memory_info'] is not None else 0
+            rows.append({
+                'pid': proc.pid,
+                'name': info['name'],
+                'cpu': round(cpu, 1),
+                'memory': rss,
+                'memory_percent': round(rss / total_memory * 100, 1),
+                'io': round(io_rate),
+            })
+        self._previous = current
+        self._last_tick = now
+
+        top = heapq.nlargest(self.top, rows, key=lambda row: row[self.sort])
+        duration = time.perf_counter() - started
+        self._stats['ticks'] += 1
+        self._stats['processes'] = len(rows)
+        self._stats['last_duration'] = duration
+        self._stats['total_duration'] += duration
+        return {'Timestamp': time.time(), 'sort': self.sort, 'count': len(rows), 'processes': top}
+
+    def start(self):
+        """Primes the CPU and I/O baselines and starts the background thread."""
+        if self._thread is not None:
+            return
+        self.collect()
+        self._thread = threading.Thread(target=self._run, name='process-table', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            try:
+                self._publish(self.collect())
+            except Exception as e:
+                print(f"Error collecting processes: {e}")
+            # Keep collection under the CPU budget on very busy hosts
+            delay = max(self.interval, self._stats['last_duration'] / self.budget)
+            self._stats['interval'] = delay
+
+    def add_listener(self, callback):
+        """Registers `callback(snapshot)` to run after every collected tick."""
+        self._listeners.append(callback)
+
+    def _publish(self, snapshot):
+        self._snapshot = snapshot
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error in process listener: {e}")
+
+    def latest(self):
+        """Returns the most recent snapshot, or None before the first tick."""
+        return self._snapshot
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['mean_duration'] = stats['total_duration'] / stats['ticks'] if stats['ticks'] else 0.0
+        return stats
@@ -0,0 +1,117 @@
+import time
+import threading
+
+# Percentages watched for changes; a move of `threshold` points in any of them
+# brings the sampler back to its fastest rate
+WATCHED = ('TotalCPUUsage', 'Memory.Percentage', 'Swap.Percentage')
+
+DEFAULT_ACTIVE = (1.0, 5.0)
+DEFAULT_IDLE = (10.0, 60.0)
+DEFAULT_THRESHOLD = 5.0
+DEFAULT_STABLE_SAMPLES = 5
+
+
+def parse_profile(value):
+    """Parses 'MIN:MAX' (or a single 'SECONDS') into a (min, max) interval pair."""
+    low, _, high = str(value).partition(':')
+    low = float(low)
+    high = float(high) if high else low
+    if low <= 0 or high < low:
+        raise ValueError(f"Invalid rate profile: {value} (expected MIN:MAX seconds)")
+    return low, high
+
+
+class RateController:
+    """Adapts the sampling interval to subscriptions and to how much metrics move.
+
+    With no subscribers the idle profile applies, otherwise the active one
+    (its minimum lowered to the shortest interval a subscriber asked for).
+    Inside a profile the interval starts at the minimum, doubles after every
+    `stable_samples` samples in which no WATCHED value moved `threshold`
+    points away from the reference sample, up to the maximum, and drops back
+    to the minimum as soon as one does. Add `observe` as a sampler listener;
+    `apply(interval)` is called whenever the interval changes.
+    """
+
+    def __init__(self, apply, active=DEFAULT_ACTIVE, idle=DEFAULT_IDLE,
+                 threshold=DEFAULT_THRESHOLD, stable_samples=DEFAULT_STABLE_SAMPLES):
+        self.apply = apply
+        self.active = active
+        self.idle = idle
+        self.threshold = threshold
+        self.stable_samples = stable_samples
+        self._subscribers = {}
+        self._reference = None
+        self._stable = 0
+        self._lock = threading.Lock()
+        self.interval = idle[0]
+
+    def _profile(self):
+        now = time.monotonic()
+        self._subscribers = {k: v for k, v in self._subscribers.items() if v[1] is None or v[1] > now}
+        if not self._subscribers:
+            return self.idle
+        requested = [interval for interval, _ in self._subscribers.values() if interval]
+        low = min([self.active[0]] + requested)
+        return low, max(self.active[1], low)
+
+    def _set(self, interval):
+        if interval != self.interval:
+            self.interval = interval
+            self.apply(interval)
+
+    def subscribe(self, subscriber='master', interval=None, ttl=None):
+        """Adds or renews a subscriber; `ttl` seconds makes it expire unless renewed."""
+        with self._lock:
+            expires = time.monotonic() + ttl if ttl else None
+            self._subscribers[subscriber] = (interval, expires)
+            self._stable = 0
+            self._set(self._profile()[0])
+            return self.interval
+
+    def unsubscribe(self, subscriber='master'):
+        with self._lock:
+            self._subscribers.pop(subscriber, None)
+            low, high = self._profile()
+            self._set(min(max(self.interval, low), high))
+            return self.interval
+
+    def clear(self):
+        """Drops every subscription (e.g. when the master reconnects)."""
+        with self._lock:
+            self._subscribers.clear()
+            self._set(self._profile()[0])
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def observe(self, snapshot):
+        with self._lock:
+            low, high = self._profile()
+            reference = self._reference
+            moved = reference is None or any(
+                abs(snapshot.get(name, 0.0) - reference.get(name, 0.0)) >= self.threshold for name in WATCHED
+            )
+            if moved:
+                self._reference = snapshot
+                self._stable = 0
+                self._set(low)
+                return
+            self._stable += 1
+            interval = min(max(self.interval, low), high)
+            if self._stable >= self.stable_samples:
+                self._stable = 0
+                interval = min(interval * 2, high)
+            self._set(interval)
+
+    def stats(self):
+        with self._lock:
+            low, high = self._profile()
+            return {
+                'interval': self.interval,
+                'subscribers': len(self._subscribers),
+                'profile': 'active' if self._subscribers else 'idle',
+                'min_interval': low,
+                'max_interval': high,
+            }
@@ -0,0 +1,158 @@
+import time
+import operator
+import threading
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# The opposite comparison, used with a separate `clear` value for hysteresis
+_CLEAR_OPERATORS = {'>': '<=', '>=': '<', '<': '>=', '<=': '>', '==': '!=', '!=': '=='}
+
+DEFAULT_RULES = [
+    {'name': 'cpu_high', 'metric': 'TotalCPUUsage', 'op': '>', 'value': 90, 'for': 30, 'clear': 80, 'clear_for': 30},
+    {'name': 'swap_high', 'metric': 'Swap.Percentage', 'op': '>', 'value': 50, 'clear': 40},
+]
+
+OK, PENDING, FIRING, CLEARING = 'ok', 'pending', 'firing', 'clearing'
+
+
+class Rule:
+    """One condition on a metric, with sustained-duration windows and hysteresis.
+
+    The rule fires once `metric op value` has held for `duration` seconds and
+    resolves once the clear condition has held for `clear_duration` seconds.
+    The clear condition is the opposite comparison against `clear` when set
+    (e.g. fire above 90, resolve below 80), otherwise just "not firing".
+    """
+
+    def __init__(self, name, metric, op, value, duration=0, clear=None, clear_duration=0, severity='warning'):
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator in rule {name}: {op}")
+        self.name = name
+        self.metric = metric
+        self.op = op
+        self.value = value
+        self.duration = duration
+        self.clear = clear
+        self.clear_duration = clear_duration
+        self.severity = severity
+
+        self.state = OK
+        self.since = None
+        self.fired_at = None
+        self.last_value = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a rule from its JSON form; {'service': X, 'state': 'stopped'} is shorthand for a unit state rule."""
+        config = dict(config)
+        if 'service' in config:
+            service = config.pop('service')
+            config.setdefault('name', f"{service}_{config.get('state', 'stopped')}")
+            config['metric'] = f"Service.{service}"
+            config['op'] = '=='
+            config['value'] = config.pop('state', 'stopped')
+        return cls(
+            config['name'], config['metric'], config.get('op', '>'), config['value'],
+            config.get('for', 0), config.get('clear'), config.get('clear_for', 0), config.get('severity', 'warning'),
+        )
+
+    def triggered(self, value):
+        return OPERATORS[self.op](value, self.value)
+
+    def cleared(self, value):
+        if self.clear is None:
+            return not self.triggered(value)
+        return OPERATORS[_CLEAR_OPERATORS[self.op]](value, self.clear)
+
+    def update(self, value, now):
+        """Advances the state machine; returns 'alert', 'resolve' or None."""
+        self.last_value = value
+        if self.state in (OK, PENDING):
+            if not self.triggered(value):
+                self.state, self.since = OK, None
+                return None
+            if self.state == OK:
+                self.state, self.since = PENDING, now
+            if now - self.since >= self.duration:
+                self.state, self.since, self.fired_at = FIRING, None, now
+                return 'alert'
+            return None
+
+        if not self.cleared(value):
+            self.state, self.since = FIRING, None
+            return None
+        if self.state == FIRING:
+            self.state, self.since = CLEARING, now
+        if now - self.since >= self.clear_duration:
+            self.state, self.since = OK, None
+            return 'resolve'
+        return None
+
+    def alert(self, now):
+        return {
+            'rule': self.name,
+            'severity': self.severity,
+            'metric': self.metric,
+            'value': self.last_value,
+            'threshold': f"{self.op} {self.value}",
+            'since': self.fired_at,
+            'timestamp': now,
+        }
+
+
+class RuleEngine:
+    """Evaluates rules against the latest metric values and reports transitions.
+
+    Feed it with `update(values, timestamp)` from any source. Sampled
+    metrics are only evaluated when they arrive, so a duration never
+    advances without a fresh reading behind it. States that are only pushed
+    when they change, such as units ('Service.<unit>' -> 'running'/'stopped'),
+    are passed with `persistent=True`: the engine keeps them and evaluates
+    their rules again on every later update, which is what lets a rule with
+    a `for` duration fire while the state stays the same. `on_alert(event,
+    data)` is called with 'alert' or 'alert_resolved'.
+    """
+
+    def __init__(self, rules, on_alert):
+        self.rules = list(rules)
+        self.on_alert = on_alert
+        self._persistent = {}
+        self._lock = threading.Lock()
+
+    def update(self, values, timestamp=None, persistent=False):
+        now = timestamp if timestamp is not None else time.time()
+        events = []
+        with self._lock:
+            if persistent:
+                self._persistent.update(values)
+            current = dict(self._persistent)
+            current.update(values)
+            for rule in self.rules:
+                if rule.metric not in current:
+                    continue
+                transition = rule.update(current[rule.metric], now)
+                if transition == 'alert':
+                    events.append(('alert', rule.alert(now)))
+                elif transition == 'resolve':
+                    events.append(('alert_resolved', {
+                        'rule': rule.name,
+                        'metric': rule.metric,
+                        'value': rule.last_value,
+                        'duration': round(now - rule.fired_at, 1),
+                        'timestamp': now,
+                    }))
+        for event, data in events:
+            self.on_alert(event, data)
+
+    def firing(self):
+        """Alerts that are currently active (firing or waiting to clear)."""
+        now = time.time()
+        with self._lock:
+            return [rule.alert(now) for rule in self.rules if rule.state in (FIRING, CLEARING)]
@@ -0,0 +1,162 @@
+import time
+import threading
+
+import psutil
+
+
+def _busy_and_total(times):
+    total = sum(times)
+    idle = times.idle + getattr(times, 'iowait', 0.0)
+    return total - idle, total
+
+
+def _percent(previous, current):
+    """CPU usage between two cpu_times readings, the same way psutil.cpu_percent computes it."""
+    busy_before, total_before = _busy_and_total(previous)
+    busy_after, total_after = _busy_and_total(current)
+    total_delta = total_after - total_before
+    if total_delta <= 0:
+        return 0.0
+    busy_delta = max(busy_after - busy_before, 0.0)
+    return round(min(busy_delta / total_delta * 100, 100.0), 1)
+
+
+class MetricSampler:
+    """Samples CPU, memory and swap counters on a background thread.
+
+    CPU usage is computed from the delta between consecutive cpu_times()
+    readings, so no call ever blocks waiting for a measurement window. The most
+    recent snapshot is published as an immutable dict that readers grab without
+    locking; `wait_for_sample` lets a sender tick exactly once per new sample,
+    and listeners added with `add_listener` are called on the sampler thread.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._snapshot = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._collectors = []
+        self._prev_total = None
+        self._prev_cores = None
+
+    def start(self):
+        """Primes the CPU baseline, publishes a first sample and starts the background thread."""
+        if self._thread is not None:
+            return
+        self._prev_total = psutil.cpu_times()
+        self._prev_cores = psutil.cpu_times(percpu=True)
+        time.sleep(min(self.interval, 0.1))
+        self._publish(self.sample())
+        self._thread = threading.Thread(target=self._run, name='metric-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        last_tick = time.monotonic()
+        next_tick = last_tick + self.interval
+        while True:
+            self._wake.wait(max(next_tick - time.monotonic(), 0))
+            if self._stop.is_set():
+                return
+            if self._wake.is_set():
+                # The interval changed: reschedule relative to the last sample
+                self._wake.clear()
+                next_tick = last_tick + self.interval
+                if next_tick > time.monotonic():
+                    continue
+            last_tick = time.monotonic()
+            try:
+                self._publish(self.sample())
+            except Exception as e:
+                print(f"Error sampling metrics: {e}")
+            # Schedule on a fixed grid so sampling cost does not stretch the interval
+            next_tick += self.interval
+            if next_tick < time.monotonic():
+                next_tick = time.monotonic() + self.interval
+
+    def set_interval(self, interval):
+        """Changes the sampling interval; the next sample is rescheduled right away."""
+        self.interval = interval
+        self._wake.set()
+
+    def sample(self):
+        """Takes one non-blocking sample relative to the previous one."""
+        metrics = {'Timestamp': time.time()}
+
+        total = psutil.cpu_times()
+        cores = psutil.cpu_times(percpu=True)
+        for i, (before, after) in enumerate(zip(self._prev_cores, cores)):
+            metrics[f"Core_{i}"] = _percent(before, after)
+        metrics['TotalCPUUsage'] = _percent(self._prev_total, total)
+        self._prev_total, self._prev_cores = total, cores
+        cpufreq = psutil.cpu_freq()
+        metrics['CurrentFrequency'] = cpufreq.current if cpufreq else 0.0
+
+        svmem = psutil.virtual_memory()
+        metrics['Memory.Total'] = svmem.total
+        metrics['Memory.Available'] = svmem.available
+        metrics['Memory.Used'] = svmem.used
+        metrics['Memory.Percentage'] = svmem.percent
+
+        swap = psutil.swap_memory()
+        metrics['Swap.Total'] = swap.total
+        metrics['Swap.Free'] = swap.free
+        metrics['Swap.Used'] = swap.used
+        metrics['Swap.Percentage'] = swap.percent
+
+        for collector in self._collectors:
+            try:
+                collector(metrics)
+            except Exception as e:
+                print(f"Error in sampler collector: {e}")
+
+        return metrics
+
+    def add_collector(self, callback):
+        """Registers `callback(metrics)` to add fields to every sample; it runs on the sampler thread and must not block."""
+        self._collectors.append(callback)
+
+    def add_listener(self, callback):
+        """Registers `callback(snapshot)` to run after every published sample."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def _publish(self, snapshot):
+        with self._cond:
+            self._snapshot = snapshot
+            self._seq += 1
+            self._cond.notify_all()
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error in sampler listener: {e}")
+
+    def latest(self):
+        """Returns the most recent snapshot without blocking."""
+        return self._snapshot
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def wait_for_sample(self, seq, timeout=None):
+        """Blocks until a snapshot newer than `seq` is published; returns (seq, snapshot)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._stop.is_set(), timeout)
+            return self._seq, self._snapshot
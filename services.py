@@ -0,0 +1,181 @@
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_UNITS = ['apache2', 'nginx', 'redis', 'openssh', 'cmatrix']
+PROPERTIES = ['Id', 'LoadState', 'ActiveState', 'SubState', 'UnitFileState']
+CONTROL_ACTIONS = ('start', 'stop', 'restart', 'reload', 'enable', 'disable')
+DEFAULT_PARALLELISM = 4
+
+
+def run_systemctl_show(units):
+    """Runs one `systemctl show` for all `units` and returns its stdout."""
+    result = subprocess.run(
+        ['systemctl', 'show', '--property=' + ','.join(PROPERTIES), '--'] + list(units),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False,
+    )
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def parse_show(output, units):
+    """Splits `systemctl show` output (one blank-line separated block per unit, in order)."""
+    blocks = []
+    current = {}
+    for line in output.splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition('=')
+        current[key] = value
+    if current:
+        blocks.append(current)
+
+    states = []
+    for i, name in enumerate(units):
+        props = blocks[i] if i < len(blocks) else {}
+        loaded = props.get('LoadState', 'not-found') != 'not-found'
+        active = props.get('ActiveState', 'inactive')
+        states.append({
+            'name': name,
+            'installed': loaded and props.get('UnitFileState') == 'enabled',
+            'status': 'running' if active == 'active' else 'stopped',
+            'load_state': props.get('LoadState', 'not-found'),
+            'active_state': active,
+            'sub_state': props.get('SubState', ''),
+            'unit_file_state': props.get('UnitFileState', ''),
+        })
+    return states
+
+
+class ServiceStatusProvider:
+    """Caches the state of a configurable set of systemd units.
+
+    All units are queried with a single `systemctl show` fork. Results are
+    reused for `ttl` seconds, and when `watch_interval` is set a background
+    thread refreshes them and calls the `add_listener` callbacks with the units
+    whose state changed, so the master no longer has to poll.
+    """
+
+    def __init__(self, units=None, ttl=5, watch_interval=None, show=run_systemctl_show):
+        self.units = list(units or DEFAULT_UNITS)
+        self.ttl = ttl
+        self.watch_interval = watch_interval
+        self._show = show
+        self._states = None
+        self._fetched = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Registers `callback(changed_states)` to run when any watched unit changes state."""
+        self._listeners.append(callback)
+
+    def query(self, units):
+        """Fetches the state of `units` right now, bypassing the cache."""
+        units = list(units)
+        if not units:
+            return []
+        return parse_show(self._show(units), units)
+
+    def get(self, units=None):
+        """Returns the states of `units` (the configured set by default), cached for `ttl` seconds."""
+        if units is not None and list(units) != self.units:
+            return self.query(units)
+        with self._lock:
+            if self._states is not None and time.monotonic() - self._fetched < self.ttl:
+                return self._states
+        return self.refresh()
+
+    def invalidate(self):
+        """Forces the next `get` to query systemctl (e.g. after starting or stopping a unit)."""
+        with self._lock:
+            self._fetched = 0.0
+
+    def refresh(self):
+        """Re-reads the configured units and notifies listeners about changes."""
+        states = self.query(self.units)
+        with self._lock:
+            previous = {s['name']: s for s in self._states or []}
+            self._states = states
+            self._fetched = time.monotonic()
+        if previous:
+            changed = [s for s in states if previous.get(s['name']) != s]
+            if changed:
+                for callback in self._listeners:
+                    try:
+                        callback(changed)
+                    except Exception as e:
+                        print(f"Error in service listener: {e}")
+        return states
+
+    def start(self):
+        if self.watch_interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='service-watch', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing service status: {e}")
+            self._stop.wait(self.watch_interval)
+
+
+def run_systemctl_action(action, unit):
+    """Runs `sudo systemctl <action> <unit>` and returns (returncode, output)."""
+    result = subprocess.run(['sudo', 'systemctl', action, '--', unit],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+    return result.returncode, result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def control_units(groups, action, parallelism=DEFAULT_PARALLELISM, stop_on_failure=False, run=run_systemctl_action):
+    """Applies `action` to groups of units and returns one aggregated report.
+
+    `groups` is a list of unit lists. Groups run one after another (e.g.
+    databases before the apps that need them) and the units inside a group
+    run in parallel, at most `parallelism` at a time. With `stop_on_failure`
+    the groups after a failed one are reported as skipped.
+    """
+    if action not in CONTROL_ACTIONS:
+        raise ValueError(f"Unsupported action: {action}")
+
+    def apply(unit):
+        started = time.monotonic()
+        try:
+            returncode, output = run(action, unit)
+        except OSError as e:
+            returncode, output = None, str(e)
+        return {
+            'name': unit,
+            'ok': returncode == 0,
+            'returncode': returncode,
+            'output': output,
+            'duration': round(time.monotonic() - started, 3),
+        }
+
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as pool:
+        for group in groups:
+            if stop_on_failure and any(not r['ok'] for r in results):
+                results.extend({'name': unit, 'ok': False, 'skipped': True} for unit in group)
+                continue
+            results.extend(pool.map(apply, group))
+    return {
+        'action': action,
+        'ok': all(r['ok'] for r in results),
+        'succeeded': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok'] and not r.get('skipped')),
+        'skipped': sum(1 for r in results if r.get('skipped')),
+        'duration': round(time.monotonic() - started, 3),
+        'units': results,
+    }
@@ -0,0 +1,145 @@
+import struct
+import time
+import platform
+from datetime import datetime
+
+import psutil
+
+# Bump whenever the field table or the packet layout below changes.
+SCHEMA_VERSION = 1
+
+# Packet header: schema version, flags, sample timestamp, number of fields.
+HEADER = struct.Struct('<BBdH')
+FLAG_KEYFRAME = 0x01
+
+# Fixed metric fields: (id, name, struct format). Byte counts are sent as raw
+# unsigned integers, percentages and frequencies as 32-bit floats.
+FIELDS = [
+    (1, 'TotalCPUUsage', 'f'),
+    (2, 'CurrentFrequency', 'f'),
+    (3, 'Memory.Available', 'Q'),
+    (4, 'Memory.Used', 'Q'),
+    (5, 'Memory.Percentage', 'f'),
+    (6, 'Swap.Free', 'Q'),
+    (7, 'Swap.Used', 'Q'),
+    (8, 'Swap.Percentage', 'f'),
+]
+
+# Per-core usage is sent as 'Core_<n>' with id CORE_FIELD_BASE + n.
+CORE_FIELD_BASE = 1000
+
+_FIELD_IDS = {name: (field_id, fmt) for field_id, name, fmt in FIELDS}
+_FIELD_NAMES = {field_id: (name, fmt) for field_id, name, fmt in FIELDS}
+
+
+def collect_inventory():
+    """Collects the static part of the system information (sent once per connection)."""
+    inventory = {}
+
+    uname = platform.uname()
+    inventory['System'] = uname.system
+    inventory['NodeName'] = uname.node
+    inventory['Release'] = uname.release
+    inventory['Version'] = uname.version
+    inventory['Machine'] = uname.machine
+    inventory['Processor'] = uname.processor
+
+    bt = datetime.fromtimestamp(psutil.boot_time())
+    inventory['BootTime'] = f"{bt.year}/{bt.month}/{bt.day} {bt.hour}:{bt.minute}:{bt.second}"
+
+    inventory['PhysicalCores'] = psutil.cpu_count(logical=False)
+    inventory['TotalCores'] = psutil.cpu_count(logical=True)
+    cpufreq = psutil.cpu_freq()
+    inventory['MaxFrequency'] = cpufreq.max if cpufreq else None
+    inventory['MinFrequency'] = cpufreq.min if cpufreq else None
+
+    inventory['MemoryTotal'] = psutil.virtual_memory().total
+    inventory['SwapTotal'] = psutil.swap_memory().total
+
+    return inventory
+
+
+def schema():
+    """Describes the field table so the master can decode packets without hardcoding it."""
+    return {
+        'version': SCHEMA_VERSION,
+        'fields': {name: {'id': field_id, 'format': fmt} for field_id, name, fmt in FIELDS},
+        'core_field_base': CORE_FIELD_BASE,
+    }
+
+
+def _field_spec(name):
+    if name in _FIELD_IDS:
+        return _FIELD_IDS[name]
+    if name.startswith('Core_'):
+        return CORE_FIELD_BASE + int(name[5:]), 'f'
+    return None
+
+
+class DeltaEncoder:
+    """Encodes metric samples as binary packets carrying only the fields that changed.
+
+    The first packet after a reset (and every `keyframe_interval` packets after
+    that) is a keyframe with every field, so a master that joins late or drops a
+    packet resynchronises on its own.
+    """
+
+    def __init__(self, tolerance=0.05, keyframe_interval=60):
+        self.tolerance = tolerance
+        self.keyframe_interval = keyframe_interval
+        self.reset()
+
+    def reset(self):
+        """Forget what was sent so the next packet is a keyframe (e.g. after a reconnect)."""
+        self._last = {}
+        self._since_keyframe = None
+
+    def _changed(self, name, fmt, value):
+        if name not in self._last:
+            return True
+        previous = self._last[name]
+        if fmt == 'f':
+            return abs(value - previous) >= self.tolerance
+        return value != previous
+
+    def encode(self, metrics, timestamp=None):
+        """Returns the packet for `metrics`, always at least a header so it doubles as a heartbeat."""
+        if timestamp is None:
+            timestamp = time.time()
+
+        keyframe = self._since_keyframe is None or self._since_keyframe >= self.keyframe_interval
+        body = []
+        for name, value in metrics.items():
+            spec = _field_spec(name)
+            if spec is None:
+                continue
+            field_id, fmt = spec
+            if keyframe or self._changed(name, fmt, value):
+                body.append(struct.pack('<H' + fmt, field_id, value))
+                self._last[name] = value
+
+        self._since_keyframe = 0 if keyframe else self._since_keyframe + 1
+        flags = FLAG_KEYFRAME if keyframe else 0
+        return HEADER.pack(SCHEMA_VERSION, flags, timestamp, len(body)) + b''.join(body)
+
+
+def decode_delta(packet):
+    """Decodes a packet from DeltaEncoder.encode into (timestamp, keyframe, metrics)."""
+    version, flags, timestamp, count = HEADER.unpack_from(packet, 0)
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported telemetry schema version: {version}")
+
+    metrics = {}
+    offset = HEADER.size
+    for _ in range(count):
+        (field_id,) = struct.unpack_from('<H', packet, offset)
+        offset += 2
+        if field_id >= CORE_FIELD_BASE:
+            name, fmt = f"Core_{field_id - CORE_FIELD_BASE}", 'f'
+        else:
+            name, fmt = _FIELD_NAMES[field_id]
+        (value,) = struct.unpack_from('<' + fmt, packet, offset)
+        offset += struct.calcsize('<' + fmt)
+        metrics[name] = value
+
+    return timestamp, bool(flags & FLAG_KEYFRAME), metrics
@@ -0,0 +1,43 @@
+from rules import Rule, RuleEngine
+
+
+def make_engine(*configs):
+    events = []
+    engine = RuleEngine([Rule.from_config(config) for config in configs], lambda event, data: events.append((event, data)))
+    return engine, events
+
+
+def test_service_rule_with_duration_fires_on_later_ticks():
+    engine, events = make_engine({'service': 'nginx', 'state': 'stopped', 'for': 30})
+
+    # The unit state is only pushed once, when it changes
+    engine.update({'Service.nginx': 'stopped'}, 100, persistent=True)
+    assert events == []
+    assert engine.rules[0].state == 'pending'
+
+    # Sampler ticks carry no unit states but keep evaluating the one the engine holds
+    engine.update({'TotalCPUUsage': 5.0}, 115)
+    assert events == []
+    engine.update({'TotalCPUUsage': 5.0}, 131)
+    assert [event for event, _ in events] == ['alert']
+    assert events[0][1]['rule'] == 'nginx_stopped'
+
+
+def test_service_rule_resolves_when_unit_starts_again():
+    engine, events = make_engine({'service': 'nginx', 'state': 'stopped'})
+
+    engine.update({'Service.nginx': 'stopped'}, 100, persistent=True)
+    engine.update({'Service.nginx': 'running'}, 110, persistent=True)
+    engine.update({}, 120)
+    assert [event for event, _ in events] == ['alert', 'alert_resolved']
+
+
+def test_metric_rule_does_not_advance_without_a_fresh_sample():
+    engine, events = make_engine({'name': 'cpu_high', 'metric': 'TotalCPUUsage', 'op': '>', 'value': 90, 'for': 30})
+
+    engine.update({'TotalCPUUsage': 95.0}, 100)
+    # A unit state change long after the last sample must not fire the CPU rule
+    engine.update({'Service.nginx': 'running'}, 200, persistent=True)
+    assert events == []
+    engine.update({'TotalCPUUsage': 95.0}, 131)
+    assert [event for event, _ in events] == ['alert']
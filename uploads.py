@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+
+CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BUFFER = 1024 * 1024
+
+# Part file names written by UploadSession: .<filename>.<32 hex id>.part
+PART_FILE = re.compile(r'^\..+\.([0-9a-f]{32})\.part$')
+
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class UploadSession:
+    """One chunked upload: a hidden .part file next to the target plus a running SHA-256."""
+
+    def __init__(self, directory, filename, size, sha256=None):
+        self.id = uuid.uuid4().hex
+        self.directory = directory
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256.lower() if sha256 else None
+        self.target = os.path.join(directory, filename)
+        # Same directory as the target so the final rename is atomic
+        self.part = os.path.join(directory, f".{filename}.{self.id}.part")
+        self.received = 0
+        self.hash = hashlib.sha256()
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def status(self):
+        return {
+            'upload_id': self.id,
+            'filename': self.filename,
+            'offset': self.received,
+            'size': self.size,
+            'chunk_size': CHUNK_SIZE,
+        }
+
+
+class UploadManager:
+    """Tracks chunked uploads so an interrupted transfer resumes from the last good chunk."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, directory, filename, size, sha256=None):
+        if not filename or os.path.basename(filename) != filename:
+            raise UploadError(f"Invalid filename: {filename}")
+        if not os.path.isdir(directory):
+            raise UploadError(f"Directory does not exist: {directory}", 404)
+        session = UploadSession(directory, filename, size, sha256)
+        with self._lock:
+            self._sweep(directory)
+            open(session.part, 'wb').close()
+            self._sessions[session.id] = session
+        return session
+
+    def _sweep(self, directory):
+        """Removes part files whose session is unknown, i.e. left behind by an earlier agent run.
+
+        Sessions only live in memory, so such uploads can never be resumed or
+        completed; the client starts over with a new /upload/init.
+        """
+        orphans = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    match = PART_FILE.match(entry.name)
+                    if match and match.group(1) not in self._sessions and entry.is_file(follow_symlinks=False):
+                        orphans.append(entry.path)
+        except OSError:
+            return
+        for path in orphans:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing stale upload {path}: {e}")
+
+    def get(self, upload_id):
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is None:
+            raise UploadError(f"Unknown upload: {upload_id}", 404)
+        return session
+
+    def write_chunk(self, upload_id, offset, stream, chunk_sha256=None):
+        """Appends one chunk read from `stream` at `offset`, verifying it if a hash is given.
+
+        Chunks must arrive in order; a client that lost track asks for the
+        session status and resumes from the returned offset. A chunk that fails
+        verification is discarded and the file is truncated back.
+        """
+        session = self.get(upload_id)
+        with session.lock:
+            if offset != session.received:
+                raise UploadError("Unexpected offset", 409, expected_offset=session.received)
+
+            chunk_hash = hashlib.sha256()
+            file_hash = session.hash.copy()
+            written = 0
+            with open(session.part, 'r+b') as f:
+                f.seek(offset)
+                while True:
+                    block = stream.read(COPY_BUFFER)
+                    if not block:
+                        break
+                    f.write(block)
+                    chunk_hash.update(block)
+                    file_hash.update(block)
+                    written += len(block)
+                    if session.size is not None and offset + written > session.size:
+                        break
+
+                if chunk_sha256 and chunk_hash.hexdigest() != chunk_sha256.lower():
+                    f.truncate(offset)
+                    raise UploadError("Chunk checksum mismatch", 422, expected_offset=offset)
+                if session.size is not None and offset + written > session.size:
+                    f.truncate(offset)
+                    raise UploadError("Chunk exceeds declared size", 413, expected_offset=offset)
+                f.truncate(offset + written)
+
+            session.received = offset + written
+            session.hash = file_hash
+            session.updated = time.time()
+            return session.status()
+
+    def complete(self, upload_id, sha256=None):
+        """Verifies size and whole-file hash, then renames the part file into place."""
+        session = self.get(upload_id)
+        with session.lock:
+            if session.size is not None and session.received != session.size:
+                raise UploadError("Upload incomplete", 409, expected_offset=session.received)
+            expected = (sha256 or session.sha256 or '').lower()
+            digest = session.hash.hexdigest()
+            if expected and digest != expected:
+                raise UploadError("File checksum mismatch", 422, sha256=digest)
+
+            with open(session.part, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(session.part, session.target)
+
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        return {'upload_id': upload_id, 'path': session.target, 'size': session.received, 'sha256': digest}
+
+    def abort(self, upload_id):
+        session = self.get(upload_id)
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        try:
+            os.remove(session.part)
+        except FileNotFoundError:
+            pass
+
+    def expire(self, max_idle):
+        """Drops sessions idle for more than `max_idle` seconds along with their part files."""
+        cutoff = time.time() - max_idle
+        with self._lock:
+            stale = [s.id for s in self._sessions.values() if s.updated < cutoff]
+        for upload_id in stale:
+            self.abort(upload_id)
+        return stale